@@ -1,187 +1,479 @@
+import argparse
+import os
 import sys
 import time
 
 # Import our custom modules
-from utils.file_handler import read_sales_data, parse_transactions, validate_and_filter
-from utils.data_processor import (
-    calculate_total_revenue, region_wise_sales, top_selling_products, 
-    customer_analysis, daily_sales_trend, enrich_sales_data
+# (heavier modules - requests, concurrent.futures, the profiler - are imported
+# on first use so short runs start quickly)
+from utils.file_handler import read_sales_data, parse_transactions
+from utils.pipeline import (
+    DEFAULT_INPUT, DEFAULT_ENRICHED, DEFAULT_REPORT,
+    load_product_mapping, output_collisions, output_paths, process_file, _no_wrap
 )
-from utils.api_handler import fetch_all_products, create_product_mapping
-from utils.report_generator import generate_sales_report
 
-def main():
+PROFILE_MODES = ('cprofile', 'sampling')  # same as utils.profiler.PROFILE_MODES
+
+# Profiling switch (no code changes needed to diagnose a slow run):
+#   SALES_PROFILE=cprofile|sampling
+#   SALES_PROFILE_STAGES=pipeline (default) | all | parse_transactions,enrich_sales_data,generate_sales_report
+# The --profile / --profile-stages options override these.
+
+def _stage_for(args):
     """
-    Main execution function for the Sales Analytics System.
+    Returns: the stage wrapper for this run, which wraps the stages selected
+             with --profile-stages in the profiler (and leaves the rest alone).
     """
-    print("=" * 40)
-    print("SALES ANALYTICS SYSTEM")
-    print("=" * 40)
+    stages = args.profile_stages_set - {'pipeline'}
+    if not stages:
+        return _no_wrap
+
+    from utils.profiler import profile_stage
+
+    def stage(func):
+        if func.__name__ in stages:
+            return profile_stage(func, func.__name__, args.profile)
+        return func
+
+    return stage
+
+# ==========================================
+# Command Line Interface
+# ==========================================
+def parse_args(argv=None):
+    """
+    Parses command line options.
+    Returns: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(
+        description="Sales Analytics System: clean, validate, enrich and report on sales files."
+    )
+    parser.add_argument('inputs', nargs='*',
+                        help=f"sales data file(s) to process (default: {DEFAULT_INPUT})")
+    parser.add_argument('--enriched', default=DEFAULT_ENRICHED,
+                        help=f"enriched data output path (default: {DEFAULT_ENRICHED})")
+    parser.add_argument('--report', default=DEFAULT_REPORT,
+                        help=f"report output path (default: {DEFAULT_REPORT})")
+    parser.add_argument('--format', dest='formats', default='text',
+                        help="comma-separated report formats: text, json, partial (default: text); "
+                             "partial writes a mergeable aggregate next to the report for --reduce")
+
+    filters = parser.add_argument_group('filters')
+    filters.add_argument('--region', help="only keep transactions from this region")
+    filters.add_argument('--min-amount', type=float, help="minimum transaction amount")
+    filters.add_argument('--max-amount', type=float, help="maximum transaction amount")
+    filters.add_argument('-i', '--interactive', action='store_true',
+                         help="prompt for filters on the console instead of using the options above")
+    parser.add_argument('--skip-enrich', action='store_true',
+                        help="don't fetch the product catalog from the API (no network access)")
+
+    storage = parser.add_argument_group('storage')
+    storage.add_argument('--storage', choices=['text', 'sqlite'], default='text',
+                         help="sqlite loads validated transactions into an indexed database and answers "
+                              "the analytics with SQL queries (default: text)")
+    storage.add_argument('--db', default='data/sales.db', help="SQLite database path (default: data/sales.db)")
+    storage.add_argument('--from-db', action='store_true',
+                         help="report over everything already loaded into --db without reading any input files")
+
+    sharding = parser.add_argument_group('sharding')
+    sharding.add_argument('--reduce', action='store_true',
+                          help="treat the inputs as partial aggregates written by shard runs (--format partial) "
+                               "and merge them into one report")
+
+    caching = parser.add_argument_group('result cache')
+    caching.add_argument('--cache', action='store_true',
+                         help="reuse analyses and reports when the input, filters and catalog are unchanged")
+    caching.add_argument('--cache-dir', default='output/.cache', help="cache directory (default: output/.cache)")
+    caching.add_argument('--cache-size-mb', type=float, default=64,
+                         help="evict least recently used results beyond this size (default: 64)")
+    caching.add_argument('--catalog-ttl', type=float, default=3600,
+                         help="seconds a cached product catalog stays valid (default: 3600)")
+
+    batch = parser.add_argument_group('batch processing')
+    batch.add_argument('-w', '--workers', type=int, default=1,
+                       help="number of input files processed in parallel (default: 1)")
+    batch.add_argument('--backend', choices=['thread', 'process'], default='thread',
+                       help="worker pool used when --workers > 1 in sequential mode (default: thread)")
+    batch.add_argument('--mode', choices=['sequential', 'async', 'staged'], default='sequential',
+                       help="async overlaps the product catalog fetch with file parsing; staged streams "
+                            "batches through threaded stages over bounded queues (default: sequential)")
+    batch.add_argument('--batch-size', type=int, default=1000,
+                       help="records per batch in staged mode (default: 1000)")
+    batch.add_argument('--queue-depth', type=int, default=4,
+                       help="batches buffered between stages in staged mode (default: 4)")
+
+    profiling = parser.add_argument_group('profiling')
+    profiling.add_argument('--profile', choices=PROFILE_MODES, default=os.environ.get('SALES_PROFILE'),
+                           help="profile the run with cProfile or the sampling profiler")
+    profiling.add_argument('--profile-stages', default=os.environ.get('SALES_PROFILE_STAGES', 'pipeline'),
+                           help="pipeline, all, or a comma-separated list of stage names")
+
+    args = parser.parse_args(argv)
+    if args.reduce and args.from_db:
+        parser.error("--reduce and --from-db can't be combined")
+    if args.reduce and not args.inputs:
+        parser.error("--reduce needs the partial aggregate files to merge")
+    if args.from_db and args.inputs:
+        parser.error("--from-db reports over --db and doesn't take input files")
+    if not args.inputs:
+        args.inputs = [DEFAULT_INPUT]
+    args.formats = [f.strip() for f in args.formats.split(',') if f.strip()]
+    if not args.formats or set(args.formats) - {'text', 'json', 'partial'}:
+        parser.error("--format must be a comma-separated list of: text, json, partial")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.batch_size < 1 or args.queue_depth < 1:
+        parser.error("--batch-size and --queue-depth must be at least 1")
+    if args.interactive and len(args.inputs) > 1:
+        parser.error("--interactive can only be used with a single input file")
+    if len(args.inputs) > 1 and not (args.reduce or args.from_db):
+        for path, files in output_collisions(args.inputs, args.enriched, args.report):
+            parser.error(f"{' and '.join(files)} would both write {path}; rename one of them")
+
+    # Defaults come from the environment, which argparse doesn't check against choices
+    args.profile_stages_set = set()
+    if args.profile:
+        if args.profile not in PROFILE_MODES:
+            parser.error(f"--profile (or SALES_PROFILE) must be one of: {', '.join(PROFILE_MODES)}")
+        from utils.profiler import parse_profile_stages
+        try:
+            args.profile_stages_set = parse_profile_stages(args.profile_stages)
+        except ValueError as e:
+            parser.error(f"--profile-stages (or SALES_PROFILE_STAGES): {e}")
+    return args
+
+
+def prompt_filters(input_file):
+    """
+    Shows the available filter options for a file and asks the user for criteria.
+    Returns: tuple (region, min_amount, max_amount)
+    """
+    print("Filter Options Available:")
+
+    # Calculate available options dynamically for display
+    parsed_transactions = parse_transactions(read_sales_data(input_file))
+    if parsed_transactions:
+        regions = sorted(list(set(t['Region'] for t in parsed_transactions)))
+        amounts = [t['Quantity'] * t['UnitPrice'] for t in parsed_transactions]
+        print(f"Regions: {', '.join(regions)}")
+        print(f"Amount Range: ₹{min(amounts):,.0f} - ₹{max(amounts):,.0f}")
+
+    print("")
+    user_filter = input("Do you want to filter data? (y/n): ").strip().lower()
     print("")
 
-    try:
-        # ---------------------------------------------------------
-        # 1 & 2. Read Sales Data
-        # ---------------------------------------------------------
-        print("[1/10] Reading sales data...")
-        raw_lines = read_sales_data('data/sales_data.txt')
-        
-        if not raw_lines:
-            print("Error: No data found. Exiting.")
-            return
-
-        print(f"✓ Successfully read {len(raw_lines)} transactions")
-        print("")
+    filter_region = None
+    filter_min = None
+    filter_max = None
 
-        # ---------------------------------------------------------
-        # 3. Parse and Clean
-        # ---------------------------------------------------------
-        print("[2/10] Parsing and cleaning data...")
-        parsed_transactions = parse_transactions(raw_lines)
-        print(f"✓ Parsed {len(parsed_transactions)} records")
-        print("")
+    if user_filter == 'y':
+        print("--- Enter Filter Criteria (Press Enter to skip) ---")
 
-        # ---------------------------------------------------------
-        # 4. Display Filter Options
-        # ---------------------------------------------------------
-        print("[3/10] Filter Options Available:")
-        
-        # Calculate available options dynamically for display
-        if parsed_transactions:
-            regions = sorted(list(set(t['Region'] for t in parsed_transactions)))
-            amounts = [t['Quantity'] * t['UnitPrice'] for t in parsed_transactions]
-            min_amt = min(amounts) if amounts else 0
-            max_amt = max(amounts) if amounts else 0
-            
-            print(f"Regions: {', '.join(regions)}")
-            print(f"Amount Range: ₹{min_amt:,.0f} - ₹{max_amt:,.0f}")
-        
-        print("")
-        user_filter = input("Do you want to filter data? (y/n): ").strip().lower()
+        r_input = input("Enter Region: ").strip()
+        if r_input:
+            filter_region = r_input
+
+        min_input = input("Min Amount: ").strip()
+        if min_input:
+            try:
+                filter_min = float(min_input)
+            except ValueError:
+                print("Invalid number for Min Amount. Ignoring.")
+
+        max_input = input("Max Amount: ").strip()
+        if max_input:
+            try:
+                filter_max = float(max_input)
+            except ValueError:
+                print("Invalid number for Max Amount. Ignoring.")
         print("")
 
-        # ---------------------------------------------------------
-        # 5. Get Filter Criteria (if 'y')
-        # ---------------------------------------------------------
-        filter_region = None
-        filter_min = None
-        filter_max = None
-
-        if user_filter == 'y':
-            print("--- Enter Filter Criteria (Press Enter to skip) ---")
-            
-            # Get Region
-            r_input = input("Enter Region: ").strip()
-            if r_input:
-                filter_region = r_input
-            
-            # Get Min Amount
-            min_input = input("Min Amount: ").strip()
-            if min_input:
-                try:
-                    filter_min = float(min_input)
-                except ValueError:
-                    print("Invalid number for Min Amount. Ignoring.")
-
-            # Get Max Amount
-            max_input = input("Max Amount: ").strip()
-            if max_input:
-                try:
-                    filter_max = float(max_input)
-                except ValueError:
-                    print("Invalid number for Max Amount. Ignoring.")
-            print("")
-
-        # ---------------------------------------------------------
-        # 6 & 7. Validate and Apply Filters
-        # ---------------------------------------------------------
-        print("[4/10] Validating transactions...")
-        
-        # This function handles both validation AND filtering logic
-        valid_transactions, invalid_count, summary = validate_and_filter(
-            parsed_transactions, 
-            region=filter_region, 
-            min_amount=filter_min, 
-            max_amount=filter_max
+    return filter_region, filter_min, filter_max
+
+
+def _db_path(args):
+    return args.db if args.storage == 'sqlite' else None
+
+
+def _process_one(input_file, product_mapping, args, region, min_amount, max_amount):
+    """
+    Processes one input file, catching errors so one bad file doesn't stop a batch.
+    """
+    enriched_file, report_file = output_paths(
+        input_file, args.enriched, args.report, batch=len(args.inputs) > 1
+    )
+    try:
+        return process_file(
+            input_file, product_mapping,
+            enriched_file=enriched_file, report_file=report_file,
+            region=region, min_amount=min_amount, max_amount=max_amount,
+            formats=args.formats, stage=_stage_for(args), db_path=_db_path(args)
         )
-        
-        print(f"✓ Valid: {len(valid_transactions)} | Invalid: {invalid_count}")
-        
-        if not valid_transactions:
-            print("Warning: No valid transactions left after filtering/validation.")
-            # We continue, but analysis might be empty
-        print("")
+    except Exception as e:
+        print(f"[Error] Failed to process {input_file}: {e}")
+        return None
 
-        # ---------------------------------------------------------
-        # 8. Perform Analyses
-        # ---------------------------------------------------------
-        print("[5/10] Analyzing sales data...")
-        # We call the functions to ensure they run as per requirements
-        # (The results are re-calculated in the report generator, but we run them here to validate logic)
-        _ = calculate_total_revenue(valid_transactions)
-        _ = region_wise_sales(valid_transactions)
-        _ = top_selling_products(valid_transactions)
-        _ = customer_analysis(valid_transactions)
-        _ = daily_sales_trend(valid_transactions)
-        
-        print("✓ Analysis complete")
-        print("")
 
-        # ---------------------------------------------------------
-        # 9. Fetch API Data
-        # ---------------------------------------------------------
-        print("[6/10] Fetching product data from API...")
-        api_products = fetch_all_products()
-        
-        if not api_products:
-            print("Warning: API fetch failed. Enrichment will be skipped.")
-        else:
-            print(f"✓ Fetched {len(api_products)} products")
-        print("")
+def _run_sequential(args, inputs, filters, product_mapping=None):
+    """
+    Fetches the catalog first, then processes the input files (optionally in a worker pool).
+    Returns: list of per-file summaries (None for failures).
+    """
+    region, min_amount, max_amount = filters
 
-        # ---------------------------------------------------------
-        # 10. Enrich Data
-        # ---------------------------------------------------------
-        print("[7/10] Enriching sales data...")
-        product_mapping = create_product_mapping(api_products)
-        enriched_transactions = enrich_sales_data(valid_transactions, product_mapping)
-        
-        # Calculate stats for display
-        enriched_count = sum(1 for t in enriched_transactions if t.get('API_Match'))
-        total_count = len(enriched_transactions)
-        percentage = (enriched_count / total_count * 100) if total_count > 0 else 0
-        
-        print(f"✓ Enriched {enriched_count}/{total_count} transactions ({percentage:.1f}%)")
+    # The catalog is fetched once and shared by every input file
+    if product_mapping is None and args.skip_enrich:
+        product_mapping = {}
+    elif product_mapping is None:
+        print("Fetching product data from API...")
+        product_mapping = load_product_mapping()
+        print(f"✓ Catalog has {len(product_mapping)} products")
         print("")
 
-        # ---------------------------------------------------------
-        # 11. Save Enriched Data
-        # ---------------------------------------------------------
-        print("[8/10] Saving enriched data...")
-        # Note: enrich_sales_data() already called the save function internally 
-        # as per Task 3.2 requirements. We just confirm the location here.
-        print("✓ Saved to: data/enriched_sales_data.txt")
-        print("")
+    if args.workers > 1 and len(inputs) > 1:
+        from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+        pool_class = ProcessPoolExecutor if args.backend == 'process' else ThreadPoolExecutor
+        with pool_class(max_workers=args.workers) as pool:
+            futures = [
+                pool.submit(_process_one, f, product_mapping, args, region, min_amount, max_amount)
+                for f in inputs
+            ]
+            return [future.result() for future in futures]
+
+    return [
+        _process_one(f, product_mapping, args, region, min_amount, max_amount)
+        for f in inputs
+    ]
+
+
+def _run_async(args, inputs, filters, product_mapping=None):
+    """
+    Overlaps the catalog fetch with reading, parsing and validating the input files.
+    Returns: list of per-file summaries (None for failures).
+    """
+    from utils.async_pipeline import run_pipeline
+
+    batch = len(args.inputs) > 1
+    jobs = [(f,) + output_paths(f, args.enriched, args.report, batch=batch) for f in inputs]
+
+    return run_pipeline(
+        jobs,
+        filters=filters,
+        formats=args.formats,
+        fetch_catalog=not args.skip_enrich,
+        workers=args.workers,
+        stage=_stage_for(args),
+        db_path=_db_path(args),
+        product_mapping=product_mapping
+    )
+
+
+def _run_staged(args, inputs, filters, product_mapping=None):
+    """
+    Streams each input file through the staged executor (read/parse/validate/enrich/write).
+    Returns: list of per-file summaries (None for failures).
+    """
+    from utils.staged_pipeline import run_pipeline
+
+    batch = len(args.inputs) > 1
+    jobs = [(f,) + output_paths(f, args.enriched, args.report, batch=batch) for f in inputs]
+
+    return run_pipeline(
+        jobs,
+        filters=filters,
+        formats=args.formats,
+        fetch_catalog=not args.skip_enrich,
+        batch_size=args.batch_size,
+        queue_depth=args.queue_depth,
+        stage=_stage_for(args),
+        db_path=_db_path(args),
+        product_mapping=product_mapping
+    )
+
+
+RUNNERS = {
+    'sequential': _run_sequential,
+    'async': _run_async,
+    'staged': _run_staged,
+}
+
+
+def _restore_cached(cached, input_file, args):
+    """
+    Writes the outputs of a cache hit (enriched data, report, JSON, partial
+    aggregate) to this run's output paths.
+    Returns: the cached summary, pointing at this run's output paths
+    """
+    from utils.pipeline import save_analyses_json, partial_path
+
+    enriched_file, report_file = output_paths(input_file, args.enriched, args.report,
+                                              batch=len(args.inputs) > 1)
+    summary = dict(cached['summary'], enriched_file=enriched_file, report_file=report_file)
+
+    _write_text(enriched_file, cached['enriched_text'])
+
+    if 'text' in args.formats:
+        _write_text(report_file, cached['report_text'])
+        print(f"[Cache] Reused report for {input_file} -> {report_file}")
+
+    if 'partial' in args.formats:
+        summary['partial_file'] = partial_path(report_file)
+        _write_text(summary['partial_file'], cached['partial_text'])
+
+    if 'json' in args.formats:
+        json_file = os.path.splitext(report_file)[0] + '.json'
+        save_analyses_json(cached['analyses'], summary, json_file)
+
+    return summary
+
+
+def _read_text(path):
+    """
+    Returns: the file's contents, or None if it can't be read
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_text(path, text):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def _run_cached(args, filters):
+    """
+    Serves unchanged inputs from the result cache and runs the selected mode on the rest.
+    Returns: list of per-file summaries (None for failures), in input order.
+    """
+    from utils.result_cache import ResultCache, catalog_version, load_catalog_cached
+
+    cache = ResultCache(args.cache_dir, int(args.cache_size_mb * 1024 * 1024))
+
+    # The catalog version is part of the key, so the catalog is loaded up front
+    # (from the catalog cache while it is younger than --catalog-ttl)
+    if args.skip_enrich:
+        product_mapping = {}
+    else:
+        product_mapping = load_catalog_cached(load_product_mapping, args.cache_dir, args.catalog_ttl)
+    version = catalog_version(product_mapping)
+
+    results = {}
+    keys = {}
+    for input_file in args.inputs:
+        try:
+            keys[input_file] = cache.make_key(cache.file_fingerprint(input_file), filters, version)
+        except OSError:
+            continue  # missing file: let the pipeline report it
+
+        cached = cache.get(keys[input_file])
+        if (cached is not None
+                and ('text' not in args.formats or cached['report_text'] is not None)
+                and ('partial' not in args.formats or cached['partial_text'] is not None)):
+            results[input_file] = _restore_cached(cached, input_file, args)
+
+    pending = [f for f in args.inputs if f not in results]
+    if pending:
+        fresh = RUNNERS[args.mode](args, pending, filters, product_mapping)
+        for input_file, summary in zip(pending, fresh):
+            results[input_file] = summary
+            if summary is None or input_file not in keys:
+                continue
+
+            # Outputs that weren't written (or weren't requested) are stored as None
+            enriched_text = _read_text(summary['enriched_file'])
+            report_text = _read_text(summary['report_file']) if 'text' in args.formats else None
+            partial_text = _read_text(summary['partial_file']) if 'partial' in args.formats else None
+            if enriched_text is None or ('text' in args.formats and report_text is None) \
+                    or ('partial' in args.formats and partial_text is None):
+                continue  # something wasn't written, so there is nothing complete to reuse
+
+            cache_summary = {k: v for k, v in summary.items() if k != 'analyses'}
+            cache.put(keys[input_file], {
+                'summary': cache_summary,
+                'analyses': summary['analyses'],
+                'enriched_text': enriched_text,
+                'report_text': report_text,
+                'partial_text': partial_text,
+            })
+
+    return [results[f] for f in args.inputs]
+
+
+def main(argv=None):
+    """
+    Main execution function for the Sales Analytics System.
+    Returns: process exit code (0 if every input was processed).
+    """
+    args = parse_args(argv)
+
+    if 'pipeline' in args.profile_stages_set:
+        from utils.profiler import run_profiled
+        return run_profiled(run, 'pipeline', args.profile, 'output', args)
+    return run(args)
+
+
+def run(args):
+    """
+    Processes the inputs as described by the parsed command line options.
+    Returns: process exit code (0 if every input was processed).
+    """
+    print("=" * 40)
+    print("SALES ANALYTICS SYSTEM")
+    print("=" * 40)
+    print("")
+
+    start = time.perf_counter()
+
+    try:
+        region, min_amount, max_amount = args.region, args.min_amount, args.max_amount
+        if args.interactive:
+            region, min_amount, max_amount = prompt_filters(args.inputs[0])
+
+        filters = (region, min_amount, max_amount)
+
+        if args.from_db:
+            from utils.pipeline import report_from_db
+            args.inputs = [args.db]
+            results = [report_from_db(args.db, args.report, args.formats, stage=_stage_for(args), filters=filters)]
+        elif args.reduce:
+            from utils.pipeline import report_from_partials
+            partial_files = args.inputs
+            args.inputs = [f"{len(partial_files)} partial aggregate(s)"]
+            results = [report_from_partials(partial_files, args.report, args.formats, stage=_stage_for(args))]
+        elif args.cache and args.storage == 'sqlite':
+            # A cache hit would skip loading the rows into the database
+            print("[Cache] Not used with --storage sqlite; every run loads the database")
+            results = RUNNERS[args.mode](args, args.inputs, filters)
+        elif args.cache:
+            results = _run_cached(args, filters)
+        else:
+            results = RUNNERS[args.mode](args, args.inputs, filters)
 
-        # ---------------------------------------------------------
-        # 12. Generate Report
-        # ---------------------------------------------------------
-        print("[9/10] Generating report...")
-        generate_sales_report(valid_transactions, enriched_transactions, 'output/sales_report.txt')
-        print("✓ Report saved to: output/sales_report.txt")
         print("")
+        for input_file, summary in zip(args.inputs, results):
+            if summary is None:
+                print(f"✗ {input_file}: failed")
+                continue
+            print(f"✓ {input_file}: {summary['final_count']} valid | {summary['invalid']} invalid | "
+                  f"{summary.get('duplicates', 0) + summary.get('conflicts', 0)} duplicate IDs | "
+                  f"{summary['enriched']} enriched -> {summary['report_file']}")
 
-        # ---------------------------------------------------------
-        # 13. Final Success Message
-        # ---------------------------------------------------------
-        print("[10/10] Process Complete!")
+        elapsed = time.perf_counter() - start
+        print(f"Process Complete! ({len(args.inputs)} file(s) in {elapsed:.2f}s)")
         print("========================================")
+        return 0 if all(r is not None for r in results) else 1
 
     except Exception as e:
         print("\n!!! CRITICAL SYSTEM ERROR !!!")
         print(f"An unexpected error occurred: {e}")
         print("Please check your data files and try again.")
         print("========================================")
+        return 1
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Correctness, throughput and memory check for parse_transactions.
+
+1. Parses the dirty rows in data/sales_data.txt (plus a few extra edge cases)
+   with parse_transactions (with and without intern_strings) and with the
+   original implementation kept below as the reference, and fails if any
+   record differs.
+2. Times them on a synthetic file (interleaved runs, median) and fails if
+   either mode is under the rows/sec target, or if the default one-pass
+   parser is slower than the reference (beyond --tolerance for timing noise).
+   It is about as fast as the reference; the gain is a few percent at best.
+3. Measures the memory held by the parsed records and fails if
+   intern_strings=True doesn't reduce it. Interning is a memory optimization:
+   about 40% less memory held by the records, for 10-20% more parse time.
+
+Usage: python scripts/parser_benchmark.py [--rows 20000] [--rounds 50] [--target 250000] [--tolerance 0.03]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from functools import partial  # noqa: E402
+
+from utils.file_handler import read_sales_data, parse_transactions  # noqa: E402
+
+parse_interned = partial(parse_transactions, intern_strings=True)
+
+# Rows the sample file doesn't cover: whitespace, signs, bad numbers, wrong field counts
+EDGE_CASES = [
+    " T900 | 2024-12-01 | P101 | Laptop, Pro , Max | 1,000 | 1,234.50 | C001 | North ",
+    "T901|2024-12-01|P101|Laptop|+3|-5|C001|North",
+    "T902|2024-12-01|P101|Laptop|1_000|2e3|C001|North",
+    "T903|2024-12-01|P101|Laptop|3.5|100|C001|North",
+    "T904|2024-12-01|P101|Laptop|abc|100|C001|North",
+    "T905|2024-12-01|P101|Laptop|3|1,2,3|C001|",
+    "T906|2024-12-01|P101|Laptop|3|100|C001",
+    "T907|2024-12-01|P101|Laptop|3|100|C001|North|extra",
+    "T908|2024-12-01|P101|Laptop| |100|C001|North",
+]
+
+
+def parse_transactions_reference(raw_lines):
+    """
+    The original parse_transactions implementation, kept as the correctness reference.
+    """
+    parsed_transactions = []
+
+    for line in raw_lines:
+        parts = line.split('|')
+
+        if len(parts) != 8:
+            continue
+
+        tid, date, pid, pname, qty_str, price_str, cid, region = parts
+
+        try:
+            clean_pname = pname.replace(',', '').strip()
+            clean_qty = qty_str.replace(',', '')
+            clean_price = price_str.replace(',', '')
+            quantity = int(clean_qty)
+            unit_price = float(clean_price)
+
+            record = {
+                'TransactionID': tid.strip(),
+                'Date': date.strip(),
+                'ProductID': pid.strip(),
+                'ProductName': clean_pname,
+                'Quantity': quantity,
+                'UnitPrice': unit_price,
+                'CustomerID': cid.strip(),
+                'Region': region.strip()
+            }
+            parsed_transactions.append(record)
+
+        except ValueError:
+            continue
+
+    return parsed_transactions
+
+
+def synthetic_lines(rows, seed=42):
+    """
+    Builds sales lines with the same kinds of dirt as the sample file.
+    Returns: list of raw lines
+    """
+    rng = random.Random(seed)
+    products = ['Laptop', 'Mouse,Wireless', 'USB Cable', 'Monitor,LED', 'Webcam', 'Headphones']
+    regions = ['North', 'South', 'East', 'West', '']
+    lines = []
+    for i in range(rows):
+        qty = str(rng.randint(-1, 12))
+        price = rng.randint(100, 90000)
+        price_str = f"{price:,}" if rng.random() < 0.2 else str(price)
+        lines.append('|'.join([
+            f"T{i:06d}", f"2024-12-{rng.randint(1, 30):02d}", f"P{rng.randint(101, 110)}",
+            rng.choice(products), qty, price_str, f"C{rng.randint(1, 500):03d}", rng.choice(regions)
+        ]))
+    return lines
+
+
+def rows_per_second(parsers, lines, rounds):
+    """
+    Times the parsers in interleaved rounds so machine noise hits them equally.
+    Returns: dictionary name -> median rows/sec
+    """
+    timings = {name: [] for name in parsers}
+    for _ in range(rounds):
+        for name, parse in parsers.items():
+            start = time.perf_counter()
+            parse(lines)
+            timings[name].append(time.perf_counter() - start)
+    return {name: len(lines) / statistics.median(t) for name, t in timings.items()}
+
+
+def retained_kib(parse, lines):
+    tracemalloc.start()
+    records = parse(lines)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return retained / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check parse_transactions against the reference and time it.")
+    parser.add_argument('--rows', type=int, default=20000, help="synthetic rows per timed run (default: 20000)")
+    parser.add_argument('--rounds', type=int, default=50, help="interleaved timing rounds (default: 50)")
+    parser.add_argument('--target', type=float, default=250000,
+                        help="minimum rows/sec, with and without intern_strings (default: 250000)")
+    parser.add_argument('--tolerance', type=float, default=0.03,
+                        help="fraction the parser may be slower than the reference, for timing noise (default: 0.03)")
+    args = parser.parse_args()
+
+    # --- Correctness ---
+    sample = read_sales_data(os.path.join(ROOT, 'data', 'sales_data.txt')) + EDGE_CASES
+    reference = parse_transactions_reference(sample)
+    for name, parse in (('default', parse_transactions), ('intern_strings', parse_interned)):
+        records = parse(sample)
+        if records != reference:
+            for i, (a, b) in enumerate(zip(records, reference)):
+                if a != b:
+                    print(f"[Parser] FAIL ({name}): record {i} differs:\n  parsed:    {a}\n  reference: {b}")
+                    break
+            else:
+                print(f"[Parser] FAIL ({name}): {len(records)} records vs {len(reference)} from the reference")
+            return 1
+    print(f"[Parser] OK: {len(reference)} records identical to the reference ({len(sample)} input lines)")
+
+    # --- Throughput ---
+    lines = synthetic_lines(args.rows)
+    rates = rows_per_second(
+        {'default': parse_transactions, 'interned': parse_interned, 'reference': parse_transactions_reference},
+        lines, args.rounds
+    )
+    ratio = rates['default'] / rates['reference']
+    print(f"[Parser] default: {rates['default']:,.0f} rows/sec ({ratio:.2f}x reference) | "
+          f"intern_strings: {rates['interned']:,.0f} rows/sec | reference: {rates['reference']:,.0f} rows/sec "
+          f"(median of {args.rounds} rounds, target {args.target:,.0f} rows/sec)")
+
+    # --- Memory held by the parsed records ---
+    default_kib = retained_kib(parse_transactions, lines)
+    interned_kib = retained_kib(parse_interned, lines)
+    reference_kib = retained_kib(parse_transactions_reference, lines)
+    print(f"[Parser] parsed records: default {default_kib:,.0f} KiB | intern_strings {interned_kib:,.0f} KiB | "
+          f"reference {reference_kib:,.0f} KiB")
+
+    failed = False
+    for name, key in (('default', 'default'), ('intern_strings', 'interned')):
+        if rates[key] < args.target:
+            print(f"[Parser] FAIL: {name} is under the target")
+            failed = True
+    if ratio < 1 - args.tolerance:
+        print("[Parser] FAIL: slower than the reference")
+        failed = True
+    if interned_kib >= reference_kib:
+        print("[Parser] FAIL: intern_strings doesn't reduce memory")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+End-to-end check of sharded processing with mergeable partial aggregates.
+
+1. Writes a synthetic sales file and processes it in one run (the reference).
+2. Splits the same rows round-robin into shard files, so customers and dates
+   are spread over every shard, and processes each shard in its own process
+   (as separate machines would) with --format partial.
+3. Merges the shard partials with --reduce and fails if the combined analyses
+   or report differ from the reference.
+
+Usage: python scripts/shard_check.py [--rows 50000] [--shards 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from parser_benchmark import synthetic_lines  # noqa: E402
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+
+
+def run_main(*args):
+    """
+    Runs main.py in a new process.
+    Returns: subprocess.Popen
+    """
+    return subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'main.py'), '--skip-enrich', *args],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+
+
+def wait_all(processes):
+    failed = False
+    for process in processes:
+        output, _ = process.communicate()
+        if process.returncode != 0:
+            print(output)
+            failed = True
+    return not failed
+
+
+def write_lines(path, lines):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join([HEADER] + lines) + '\n')
+
+
+def load_outputs(report_file):
+    """
+    Returns: tuple (report text without the timestamp line, analyses normalized for comparison)
+    """
+    with open(report_file, 'r', encoding='utf-8') as f:
+        report = [line for line in f.read().splitlines() if 'Generated:' not in line]
+
+    with open(os.path.splitext(report_file)[0] + '.json', 'r', encoding='utf-8') as f:
+        analyses = json.load(f)['analyses']
+
+    # Set-derived lists have no defined order; sums differ only in the last bits
+    for stats in analyses['customer_analysis'].values():
+        stats['products_bought'] = sorted(stats['products_bought'])
+    analyses['total_revenue'] = round(analyses['total_revenue'], 2)
+    return report, analyses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that merged shard aggregates match a single run.")
+    parser.add_argument('--rows', type=int, default=50000, help="synthetic rows (default: 50000)")
+    parser.add_argument('--shards', type=int, default=4, help="number of shards / processes (default: 4)")
+    args = parser.parse_args()
+
+    lines = synthetic_lines(args.rows)
+
+    with tempfile.TemporaryDirectory(prefix='sales-shards-') as tmp:
+        full_file = os.path.join(tmp, 'all.txt')
+        write_lines(full_file, lines)
+        reference = run_main(full_file, '--format', 'text,json',
+                             '--report', os.path.join(tmp, 'reference', 'sales_report.txt'),
+                             '--enriched', os.path.join(tmp, 'reference', 'enriched.txt'))
+
+        # --- Map: one process per shard ---
+        shard_runs = [reference]
+        partial_files = []
+        for i in range(args.shards):
+            shard_dir = os.path.join(tmp, f'shard{i}')
+            os.makedirs(shard_dir)
+            shard_file = os.path.join(shard_dir, 'sales.txt')
+            write_lines(shard_file, lines[i::args.shards])
+            shard_runs.append(run_main(shard_file, '--format', 'partial',
+                                       '--report', os.path.join(shard_dir, 'sales_report.txt'),
+                                       '--enriched', os.path.join(shard_dir, 'enriched.txt')))
+            partial_files.append(os.path.join(shard_dir, 'sales_report.partial.json'))
+
+        if not wait_all(shard_runs):
+            print("[Shards] FAIL: a shard run failed")
+            return 1
+
+        # --- Reduce ---
+        merged_report = os.path.join(tmp, 'merged', 'sales_report.txt')
+        if not wait_all([run_main('--reduce', *partial_files, '--format', 'text,json', '--report', merged_report)]):
+            print("[Shards] FAIL: reduce failed")
+            return 1
+
+        expected_report, expected_analyses = load_outputs(os.path.join(tmp, 'reference', 'sales_report.txt'))
+        merged_text, merged_analyses = load_outputs(merged_report)
+
+    if merged_analyses != expected_analyses:
+        for name in expected_analyses:
+            if merged_analyses.get(name) != expected_analyses[name]:
+                print(f"[Shards] FAIL: {name} differs from the single run")
+        return 1
+    if merged_text != expected_report:
+        for a, b in zip(merged_text, expected_report):
+            if a != b:
+                print(f"[Shards] FAIL: report differs:\n  merged: {a}\n  single: {b}")
+                break
+        else:
+            print("[Shards] FAIL: report length differs")
+        return 1
+
+    print(f"[Shards] OK: {args.shards} shards of {args.rows} rows merged into the same analyses and report "
+          f"as a single run")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Startup budget check for the analytics entry point.
+
+Runs `python -X importtime -c "import main"` several times and compares the
+median cumulative import time of main.py against a budget. Also fails if a
+module that should load lazily (requests, numpy, ...) is imported at startup.
+
+Usage: python scripts/startup_benchmark.py [--budget-ms 40] [--runs 7]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported on first use
+LAZY_MODULES = ('requests', 'numpy', 'concurrent.futures', 'cProfile', 'gzip')
+
+
+def measure_import(module='main'):
+    """
+    Imports the module in a fresh interpreter with -X importtime.
+    Returns: tuple (cumulative import time in ms, set of imported module names)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    cumulative_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        name = name.strip()
+        imported.add(name)
+        if name == module:
+            cumulative_us = int(cumulative)
+
+    return cumulative_us / 1000, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check main.py import time against a budget.")
+    parser.add_argument('--budget-ms', type=float, default=40.0, help="maximum median import time (default: 40)")
+    parser.add_argument('--runs', type=int, default=7, help="number of fresh interpreters to time (default: 7)")
+    args = parser.parse_args()
+
+    timings = []
+    imported = set()
+    for _ in range(args.runs):
+        ms, imported = measure_import()
+        timings.append(ms)
+
+    median = statistics.median(timings)
+    print(f"[Startup] import main: median {median:.1f} ms, min {min(timings):.1f} ms "
+          f"over {args.runs} runs (budget {args.budget_ms:.1f} ms)")
+
+    eager = sorted(m for m in LAZY_MODULES if m in imported)
+    if eager:
+        print(f"[Startup] FAIL: imported eagerly: {', '.join(eager)}")
+        return 1
+    if median > args.budget_ms:
+        print("[Startup] FAIL: over budget")
+        return 1
+
+    print("[Startup] OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,3 @@
-pip install requests
-import requests
-
 # ==========================================
 # Task 3.1: Fetch Product Details
 # ==========================================
@@ -10,6 +7,9 @@ def fetch_all_products():
     Fetches all products from DummyJSON API.
     Returns: list of product dictionaries.
     """
+    # Imported here so runs that never enrich don't pay for loading requests
+    import requests
+
     url = "https://dummyjson.com/products?limit=100"
     
     try:
@@ -0,0 +1,71 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from utils.pipeline import load_product_mapping, load_transactions, load_filters, finish_file, _no_wrap
+
+# ==========================================
+# Async Orchestration
+# ==========================================
+# The catalog fetch (up to 10 s on the network) starts immediately and runs
+# alongside reading, parsing and validating every input file. Enrichment of a
+# file starts as soon as both its transactions and the catalog are ready.
+
+async def _process_job(loop, pool, job, catalog_task, filters, formats, stage, db_path):
+    input_file, enriched_file, report_file = job
+    try:
+        loaded = await loop.run_in_executor(
+            pool, partial(load_transactions, input_file, *load_filters(filters, db_path), stage=stage)
+        )
+        if loaded is None:
+            return None
+
+        valid_transactions, summary = loaded
+        product_mapping = await catalog_task
+
+        return await loop.run_in_executor(
+            pool, partial(finish_file, valid_transactions, summary, product_mapping,
+                          enriched_file, report_file, formats, stage, db_path, filters)
+        )
+    except Exception as e:
+        print(f"[Error] Failed to process {input_file}: {e}")
+        return None
+
+
+async def run_pipeline_async(jobs, filters=(None, None, None), formats=('text',),
+                             fetch_catalog=True, workers=1, stage=_no_wrap, db_path=None,
+                             product_mapping=None):
+    """
+    Processes jobs concurrently with the product catalog fetch.
+    jobs: list of tuples (input_file, enriched_file, report_file)
+    filters: tuple (region, min_amount, max_amount)
+    product_mapping: an already loaded catalog (skips the fetch)
+    Returns: list of summary dictionaries (None for files that failed), in job order.
+    """
+    loop = asyncio.get_running_loop()
+
+    # One extra thread so the catalog fetch never waits behind file work
+    with ThreadPoolExecutor(max_workers=workers + 1) as pool:
+        if product_mapping is None and fetch_catalog:
+            catalog_task = loop.run_in_executor(pool, load_product_mapping)
+        else:
+            catalog_task = loop.create_future()
+            catalog_task.set_result(product_mapping or {})
+
+        results = await asyncio.gather(*[
+            _process_job(loop, pool, job, catalog_task, filters, formats, stage, db_path)
+            for job in jobs
+        ])
+
+        product_mapping = await catalog_task
+        print(f"[API] Catalog ready with {len(product_mapping)} products")
+
+    return list(results)
+
+
+def run_pipeline(jobs, **kwargs):
+    """
+    Synchronous entry point for run_pipeline_async().
+    Returns: list of summary dictionaries, in job order.
+    """
+    return asyncio.run(run_pipeline_async(jobs, **kwargs))
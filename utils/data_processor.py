@@ -218,43 +218,46 @@ from utils.file_handler import save_enriched_data
 # Task 3.2: Enrich Sales Data
 # ==========================================
 
-def enrich_sales_data(transactions, product_mapping):
+def enrich_transaction(txn, product_mapping):
     """
-    Enriches transaction data with API product information and saves to file.
+    Returns a copy of one transaction with the API product fields added.
     """
-    enriched_list = []
+    # Create a copy to avoid modifying original list in place if not intended
+    enriched_txn = txn.copy()
     
-    for txn in transactions:
-        # Create a copy to avoid modifying original list in place if not intended
-        enriched_txn = txn.copy()
-        
-        # 1. Extract Numeric ID (P101 -> 101)
-        try:
-            p_id_str = txn['ProductID']
-            # Remove 'P' and convert to int. Handle cases where format might be off.
-            if p_id_str.startswith('P'):
-                numeric_id = int(p_id_str[1:]) 
-            else:
-                numeric_id = int(p_id_str)
-        except ValueError:
-            numeric_id = -1 # Invalid ID format
-            
-        # 2. Lookup in Mapping
-        if numeric_id in product_mapping:
-            info = product_mapping[numeric_id]
-            enriched_txn['API_Category'] = info['category']
-            enriched_txn['API_Brand'] = info['brand']
-            enriched_txn['API_Rating'] = info['rating']
-            enriched_txn['API_Match'] = True
+    # 1. Extract Numeric ID (P101 -> 101)
+    try:
+        p_id_str = txn['ProductID']
+        # Remove 'P' and convert to int. Handle cases where format might be off.
+        if p_id_str.startswith('P'):
+            numeric_id = int(p_id_str[1:]) 
         else:
-            enriched_txn['API_Category'] = None
-            enriched_txn['API_Brand'] = None
-            enriched_txn['API_Rating'] = None
-            enriched_txn['API_Match'] = False
-            
-        enriched_list.append(enriched_txn)
+            numeric_id = int(p_id_str)
+    except ValueError:
+        numeric_id = -1 # Invalid ID format
+        
+    # 2. Lookup in Mapping
+    if numeric_id in product_mapping:
+        info = product_mapping[numeric_id]
+        enriched_txn['API_Category'] = info['category']
+        enriched_txn['API_Brand'] = info['brand']
+        enriched_txn['API_Rating'] = info['rating']
+        enriched_txn['API_Match'] = True
+    else:
+        enriched_txn['API_Category'] = None
+        enriched_txn['API_Brand'] = None
+        enriched_txn['API_Rating'] = None
+        enriched_txn['API_Match'] = False
+        
+    return enriched_txn
+
+def enrich_sales_data(transactions, product_mapping, output_file='data/enriched_sales_data.txt'):
+    """
+    Enriches transaction data with API product information and saves to file.
+    """
+    enriched_list = [enrich_transaction(txn, product_mapping) for txn in transactions]
         
-    # 3. Save to file (Calling the helper function from file_handler)
-    save_enriched_data(enriched_list)
+    # Save to file (Calling the helper function from file_handler)
+    save_enriched_data(enriched_list, output_file)
     
-    return enriched_list 
\ No newline at end of file
+    return enriched_list
\ No newline at end of file
@@ -0,0 +1,204 @@
+import math
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+# ==========================================
+# Bloom Filter
+# ==========================================
+class BloomFilter:
+    """
+    Fixed-size probabilistic set. "Not present" answers are exact; "present"
+    answers are wrong with probability ~error_rate once capacity items are added.
+    """
+
+    def __init__(self, capacity=1000000, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    @staticmethod
+    def hashes(item):
+        """
+        Returns: tuple (h1, h2) of hashes used to derive the bit positions.
+        Uses Python's built-in (per-process) string hash, which is far cheaper
+        than a cryptographic digest; a filter never leaves the process that built it.
+        """
+        h = hash(item) & 0xFFFFFFFFFFFFFFFF
+        return h & 0xFFFFFFFF, (h >> 32) | 1
+
+    def add(self, item, hashes=None):
+        """
+        Adds an item (hashes may be passed in if the caller already computed them).
+        Returns: True if the item may already have been present.
+        """
+        h1, h2 = hashes or self.hashes(item)
+        size = self.size
+        bits = self.bits
+        present = True
+        # Double hashing: k positions from two 64-bit hashes
+        for i in range(self.hash_count):
+            pos = (h1 + i * h2) % size
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                present = False
+                bits[byte] |= mask
+        return present
+
+    def __contains__(self, item):
+        h1, h2 = self.hashes(item)
+        bits = self.bits
+        for i in range(self.hash_count):
+            pos = (h1 + i * h2) % self.size
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+# ==========================================
+# TransactionID Deduplication
+# ==========================================
+def record_digest(txn):
+    """
+    Fingerprint of a transaction's content (everything except its ID).
+    Only compared within one process, so the built-in hash is enough.
+    """
+    return hash((txn['Date'], txn['ProductID'], txn['ProductName'], txn['Quantity'],
+                 txn['UnitPrice'], txn['CustomerID'], txn['Region']))
+
+
+class TransactionDeduplicator:
+    """
+    Detects repeated TransactionIDs without keeping every ID in memory.
+
+    IDs (with a content digest) are kept in a dictionary until more than
+    memory_limit of them have been collected; then they are spilled to an
+    indexed SQLite table in a scratch directory and added to a Bloom filter.
+    Files under the limit never touch disk. Past it, a Bloom miss means the ID
+    isn't among the spilled ones (no lookup), and a batch's Bloom hits are
+    confirmed together with one indexed query, so the cost stays linear
+    however many repeats there are.
+
+    Safe to share between threads (e.g. the stages of the staged pipeline).
+    """
+
+    # Bound parameters per lookup query (SQLite's default limit is 999)
+    QUERY_CHUNK = 500
+
+    def __init__(self, capacity=1000000, error_rate=0.01, spill_dir=None, memory_limit=100000):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.memory_limit = max(int(memory_limit), 1)
+        self.bloom = None  # created on the first spill
+        self._own_dir = spill_dir is None
+        self.spill_dir = spill_dir
+        self._conn = None
+        self._recent = {}  # ID -> digest, not spilled yet
+        self._lock = threading.Lock()
+        self.stats = {'seen': 0, 'spilled': 0, 'suspected': 0, 'duplicates': 0, 'conflicts': 0}
+
+    def _spill(self):
+        if self._conn is None:
+            if self.spill_dir is None:
+                self.spill_dir = tempfile.mkdtemp(prefix='sales-dedup-')
+            os.makedirs(self.spill_dir, exist_ok=True)
+            # Scratch data: no journal or fsync needed. Batches may come from another thread.
+            self._conn = sqlite3.connect(os.path.join(self.spill_dir, 'seen.db'), check_same_thread=False)
+            self._conn.executescript("""
+                PRAGMA journal_mode = OFF;
+                PRAGMA synchronous = OFF;
+                DROP TABLE IF EXISTS seen;
+                CREATE TABLE seen (TransactionID TEXT PRIMARY KEY, Digest INTEGER NOT NULL) WITHOUT ROWID;
+            """)
+            self.bloom = BloomFilter(self.capacity, self.error_rate)
+
+        for tid in self._recent:
+            self.bloom.add(tid)
+        with self._conn:
+            self._conn.executemany("INSERT INTO seen VALUES (?, ?)", self._recent.items())
+        self.stats['spilled'] += len(self._recent)
+        self._recent = {}
+
+    def _lookup(self, tids):
+        """
+        Exact lookup of spilled IDs.
+        Returns: dictionary of ID -> stored content digest (IDs never spilled are absent)
+        """
+        found = {}
+        for i in range(0, len(tids), self.QUERY_CHUNK):
+            chunk = tids[i:i + self.QUERY_CHUNK]
+            found.update(self._conn.execute(
+                f"SELECT TransactionID, Digest FROM seen WHERE TransactionID IN ({','.join('?' * len(chunk))})",
+                chunk
+            ))
+        return found
+
+    def check_batch(self, transactions):
+        """
+        Records a batch of transactions and classifies each one, in order.
+        Returns: list with 'new', 'duplicate' (same ID and content as an earlier
+                 record) or 'conflict' (same ID, different content) per transaction
+        """
+        kinds = ['new'] * len(transactions)
+        suspects = []
+
+        with self._lock:
+            self.stats['seen'] += len(transactions)
+            recent = self._recent
+            bloom = self.bloom
+
+            for i, txn in enumerate(transactions):
+                tid = txn['TransactionID']
+                existing = recent.get(tid)
+                if existing is not None:
+                    kinds[i] = 'duplicate' if existing == record_digest(txn) else 'conflict'
+                elif bloom is not None and tid in bloom:
+                    # May have been spilled; the Bloom filter doesn't change
+                    # during a batch, so later repeats of this ID land here too
+                    suspects.append(i)
+                else:
+                    recent[tid] = record_digest(txn)
+
+            if suspects:
+                self.stats['suspected'] += len(suspects)
+                spilled = self._lookup(list({transactions[i]['TransactionID'] for i in suspects}))
+                for i in suspects:
+                    txn = transactions[i]
+                    tid = txn['TransactionID']
+                    digest = record_digest(txn)
+                    existing = spilled.get(tid, recent.get(tid))
+                    if existing is None:
+                        # A Bloom false positive, or an ID first seen among this batch's suspects
+                        recent[tid] = digest
+                    else:
+                        kinds[i] = 'duplicate' if existing == digest else 'conflict'
+
+            for kind in kinds:
+                if kind != 'new':
+                    self.stats[kind + 's'] += 1
+
+            if len(recent) > self.memory_limit:
+                self._spill()
+
+        return kinds
+
+    def filter(self, transactions):
+        """
+        Returns: list of transactions whose IDs were not seen before (first occurrence wins)
+        """
+        return [txn for txn, kind in zip(transactions, self.check_batch(transactions)) if kind == 'new']
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+        if self._own_dir and self.spill_dir is not None:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
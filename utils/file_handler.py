@@ -1,4 +1,80 @@
+import io
 import os
+import sys
+
+# ==========================================
+# Compressed Input
+# ==========================================
+# Leading bytes of each supported compression format
+COMPRESSION_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+
+# Decompressed bytes are read in large blocks to keep per-call overhead low
+READ_BUFFER_SIZE = 1024 * 1024
+
+# Errors a damaged compressed file can raise while being read
+# (EOFError: truncated gzip/bz2/xz stream; ValueError: bad zstd frame)
+DECOMPRESSION_ERRORS = (OSError, EOFError, ValueError)
+
+
+def detect_compression(filename):
+    """
+    Identifies the compression format from the file's leading bytes (not its extension).
+    Returns: 'gzip', 'bz2', 'xz', 'zstd', or None for plain text
+    """
+    with open(filename, 'rb') as f:
+        head = f.read(6)
+    for magic, fmt in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return fmt
+    return None
+
+
+def _open_zstd(filename):
+    # zstd is not in the standard library before Python 3.14; zstandard is optional
+    try:
+        from compression import zstd
+        return zstd.open(filename, 'rb')
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(f"'{filename}' is zstd-compressed; install zstandard to read it") from None
+    # Multi-frame files (pzstd output, concatenated archives) must be read to the end,
+    # not just to the end of the first frame
+    return zstandard.ZstdDecompressor().stream_reader(open(filename, 'rb'), closefd=True,
+                                                      read_across_frames=True)
+
+
+def open_sales_file(filename, encoding='utf-8'):
+    """
+    Opens a sales file for reading text, decompressing gzip/bz2/xz/zstd input on
+    the fly. Decompression is streamed in READ_BUFFER_SIZE blocks, so the
+    decompressed file never exists on disk or in memory as a whole.
+    Returns: text file object (use as a context manager)
+    """
+    fmt = detect_compression(filename)
+    if fmt is None:
+        return open(filename, 'r', encoding=encoding, buffering=READ_BUFFER_SIZE)
+
+    if fmt == 'gzip':
+        import gzip
+        raw = gzip.open(filename, 'rb')
+    elif fmt == 'bz2':
+        import bz2
+        raw = bz2.open(filename, 'rb')
+    elif fmt == 'xz':
+        import lzma
+        raw = lzma.open(filename, 'rb')
+    else:
+        raw = _open_zstd(filename)
+
+    return io.TextIOWrapper(io.BufferedReader(raw, buffer_size=READ_BUFFER_SIZE), encoding=encoding)
 
 # ==========================================
 # Task 1.1: Read Sales Data with Encoding Handling
@@ -6,26 +82,24 @@ import os
 def read_sales_data(filename):
     """
     Reads sales data from file handling encoding issues.
+    Compressed files (gzip, bz2, xz, zstd) are detected and decompressed on the fly.
     Returns: list of raw lines (strings) without headers or empty lines.
     """
     encodings_to_try = ['utf-8', 'latin-1', 'cp1252']
     
     for encoding in encodings_to_try:
         try:
-            with open(filename, 'r', encoding=encoding) as f:
-                raw_lines = f.readlines()
-                
-            # If read is successful, process the lines immediately
             clean_lines = []
-            for line in raw_lines:
-                line = line.strip()
-                # Skip empty lines
-                if not line:
-                    continue
-                # Skip header row
-                if line.startswith('TransactionID'):
-                    continue
-                clean_lines.append(line)
+            with open_sales_file(filename, encoding) as f:
+                for line in f:
+                    line = line.strip()
+                    # Skip empty lines
+                    if not line:
+                        continue
+                    # Skip header row
+                    if line.startswith('TransactionID'):
+                        continue
+                    clean_lines.append(line)
             
             return clean_lines
 
@@ -35,20 +109,84 @@ def read_sales_data(filename):
         except FileNotFoundError:
             print(f"Error: The file '{filename}' was not found.")
             return []
+        except ImportError as e:
+            print(f"Error: {e}")
+            return []
+        except DECOMPRESSION_ERRORS as e:
+            print(f"Error: Could not decompress '{filename}': {e}")
+            return []
             
     # If all encodings fail
     print(f"Error: Could not read '{filename}' with any of the supported encodings.")
     return []
 
+def iter_sales_batches(filename, batch_size=1000):
+    """
+    Streams sales data from file in batches instead of loading it all at once.
+    Uses the same decompression, encoding fallback and header/empty-line rules as read_sales_data.
+    Yields: lists of at most batch_size raw lines.
+    Raises: the decompression error if the file turns out to be damaged after
+    batches have already been yielded.
+    """
+    encodings_to_try = ['utf-8', 'latin-1', 'cp1252']
+    emitted = 0
+
+    for encoding in encodings_to_try:
+        try:
+            with open_sales_file(filename, encoding) as f:
+                batch = []
+                line_no = 0
+                for line in f:
+                    line_no += 1
+                    # Lines already handed downstream before a decode error are not repeated
+                    if line_no <= emitted:
+                        continue
+                    line = line.strip()
+                    if line and not line.startswith('TransactionID'):
+                        batch.append(line)
+                    if len(batch) >= batch_size:
+                        yield batch
+                        emitted = line_no
+                        batch = []
+                if batch:
+                    yield batch
+            return
+
+        except UnicodeDecodeError:
+            continue
+        except FileNotFoundError:
+            print(f"Error: The file '{filename}' was not found.")
+            return
+        except ImportError as e:
+            print(f"Error: {e}")
+            return
+        except DECOMPRESSION_ERRORS as e:
+            # Once batches have gone downstream, stopping quietly would pass a
+            # truncated file off as complete, so the caller has to see the error
+            if emitted:
+                raise
+            print(f"Error: Could not decompress '{filename}': {e}")
+            return
+
+    print(f"Error: Could not read '{filename}' with any of the supported encodings.")
+
 # ==========================================
 # Task 1.2: Parse and Clean Data
 # ==========================================
-def parse_transactions(raw_lines):
+def parse_transactions(raw_lines, intern_strings=False):
     """
     Parses raw lines into a clean list of dictionaries.
     Handles data quality issues like commas in names/numbers.
+    Each field is cleaned and converted in one pass and commas are only stripped
+    when present.
+    intern_strings: memory optimization for records kept for the whole run. The
+    low-cardinality fields (Date, ProductID, ProductName, CustomerID, Region) are
+    interned so repeated values share one string object, which costs some parse
+    time (see scripts/parser_benchmark.py).
     """
     parsed_transactions = []
+    append = parsed_transactions.append
+    intern = sys.intern
     
     for line in raw_lines:
         parts = line.split('|')
@@ -60,43 +198,70 @@ def parse_transactions(raw_lines):
         # Unpack fields
         tid, date, pid, pname, qty_str, price_str, cid, region = parts
         
+        # Handle commas in numeric fields, then convert to proper types
+        if ',' in qty_str:
+            qty_str = qty_str.replace(',', '')
+        if ',' in price_str:
+            price_str = price_str.replace(',', '')
         try:
-            # Handle commas in ProductName (remove them)
-            clean_pname = pname.replace(',', '').strip()
-            
-            # Handle commas in numeric fields
-            clean_qty = qty_str.replace(',', '')
-            clean_price = price_str.replace(',', '')
+            quantity = int(qty_str)
+            unit_price = float(price_str)
+        except ValueError:
+            # Skip row if type conversion fails
+            continue
             
-            # Convert to proper types
-            quantity = int(clean_qty)
-            unit_price = float(clean_price)
+        # Handle commas in ProductName (remove them)
+        if ',' in pname:
+            pname = pname.replace(',', '')
             
-            # Create dictionary
-            record = {
+        if intern_strings:
+            append({
+                'TransactionID': tid.strip(),
+                'Date': intern(date.strip()),
+                'ProductID': intern(pid.strip()),
+                'ProductName': intern(pname.strip()),
+                'Quantity': quantity,
+                'UnitPrice': unit_price,
+                'CustomerID': intern(cid.strip()),
+                'Region': intern(region.strip())
+            })
+        else:
+            append({
                 'TransactionID': tid.strip(),
                 'Date': date.strip(),
                 'ProductID': pid.strip(),
-                'ProductName': clean_pname,
+                'ProductName': pname.strip(),
                 'Quantity': quantity,
                 'UnitPrice': unit_price,
                 'CustomerID': cid.strip(),
                 'Region': region.strip()
-            }
-            parsed_transactions.append(record)
-            
-        except ValueError:
-            # Skip row if type conversion fails
-            continue
+            })
             
     return parsed_transactions
 
 # ==========================================
 # Task 1.3: Data Validation and Filtering
 # ==========================================
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+def is_valid_transaction(txn):
+    """
+    Checks one parsed transaction against the validation rules.
+    Returns: True if the transaction is valid.
+    """
+    # Quantity and UnitPrice must be > 0
+    if txn['Quantity'] <= 0 or txn['UnitPrice'] <= 0:
+        return False
+
+    # ID Format Validation
+    return (txn['TransactionID'].startswith('T')
+            and txn['ProductID'].startswith('P')
+            and txn['CustomerID'].startswith('C'))
+
+def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None,
+                        deduplicate=True, deduplicator=None):
     """
     Validates transactions and applies optional filters.
+    Repeated TransactionIDs are dropped (first occurrence wins) so revenue isn't
+    double counted; pass a shared deduplicator to dedup across several calls.
     Returns: tuple (valid_transactions, invalid_count, filter_summary)
     """
     valid_data = []
@@ -104,25 +269,38 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     
     # --- Step 1: Validation ---
     for txn in transactions:
-        is_valid = True
-        
-        # Quantity and UnitPrice must be > 0
-        if txn['Quantity'] <= 0 or txn['UnitPrice'] <= 0:
-            is_valid = False
-            
-        # ID Format Validation
-        if not txn['TransactionID'].startswith('T'):
-            is_valid = False
-        if not txn['ProductID'].startswith('P'):
-            is_valid = False
-        if not txn['CustomerID'].startswith('C'):
-            is_valid = False
-            
-        if is_valid:
+        if is_valid_transaction(txn):
             valid_data.append(txn)
         else:
             invalid_count += 1
 
+    # --- Step 1b: Duplicate TransactionIDs ---
+    duplicate_count = 0
+    conflict_count = 0
+    if deduplicate and valid_data:
+        from utils.dedup import TransactionDeduplicator
+
+        # Every record is in memory already, so the IDs never need to be spilled
+        dedup = deduplicator or TransactionDeduplicator(capacity=max(len(valid_data), 1000),
+                                                        memory_limit=len(valid_data))
+        try:
+            unique_data = []
+            for txn, kind in zip(valid_data, dedup.check_batch(valid_data)):
+                if kind == 'new':
+                    unique_data.append(txn)
+                elif kind == 'duplicate':
+                    duplicate_count += 1
+                else:
+                    conflict_count += 1
+        finally:
+            if deduplicator is None:
+                dedup.close()
+
+        valid_data = unique_data
+        if duplicate_count or conflict_count:
+            print(f"[Validate] Removed {duplicate_count + conflict_count} repeated TransactionIDs "
+                  f"({duplicate_count} exact duplicates, {conflict_count} conflicting)")
+
     # --- Step 2: Display Options to User ---
     # Get unique regions for display
     available_regions = sorted(list(set(t['Region'] for t in valid_data)))
@@ -133,7 +311,29 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
         print(f"[Info] Transaction Amount Range: {min(amounts)} - {max(amounts)}")
 
     # --- Step 3: Filtering ---
-    filtered_data = valid_data
+    filtered_data, region_removed_count, amount_removed_count = filter_transactions(
+        valid_data, region, min_amount, max_amount
+    )
+
+    # --- Step 4: Summary ---
+    summary = {
+        'total_input': len(transactions),
+        'invalid': invalid_count,
+        'duplicates': duplicate_count,
+        'conflicts': conflict_count,
+        'filtered_by_region': region_removed_count,
+        'filtered_by_amount': amount_removed_count,
+        'final_count': len(filtered_data)
+    }
+    
+    return filtered_data, invalid_count, summary
+
+def filter_transactions(transactions, region=None, min_amount=None, max_amount=None):
+    """
+    Applies the optional region and amount filters.
+    Returns: tuple (filtered_transactions, removed_by_region, removed_by_amount)
+    """
+    filtered_data = transactions
     
     # Filter by Region
     if region:
@@ -156,54 +356,51 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     amount_removed_count = count_before_amount - len(filtered_data)
     print(f"[Filter] Records after amount filter: {len(filtered_data)}")
 
-    # --- Step 4: Summary ---
-    summary = {
-        'total_input': len(transactions),
-        'invalid': invalid_count,
-        'filtered_by_region': region_removed_count,
-        'filtered_by_amount': amount_removed_count,
-        'final_count': len(filtered_data)
-    }
-    
-    return filtered_data, invalid_count, summary
+    return filtered_data, region_removed_count, amount_removed_count
+
+ENRICHED_HEADER = [
+    "TransactionID", "Date", "ProductID", "ProductName", "Quantity",
+    "UnitPrice", "CustomerID", "Region", "API_Category", "API_Brand",
+    "API_Rating", "API_Match"
+]
+
+def format_enriched_row(txn):
+    """
+    Formats one enriched transaction as a pipe-delimited line (without newline).
+    """
+    row = [
+        str(txn.get('TransactionID', '')),
+        str(txn.get('Date', '')),
+        str(txn.get('ProductID', '')),
+        str(txn.get('ProductName', '')),
+        str(txn.get('Quantity', '')),
+        str(txn.get('UnitPrice', '')),
+        str(txn.get('CustomerID', '')),
+        str(txn.get('Region', '')),
+        str(txn.get('API_Category', '') if txn.get('API_Category') is not None else ''),
+        str(txn.get('API_Brand', '') if txn.get('API_Brand') is not None else ''),
+        str(txn.get('API_Rating', '') if txn.get('API_Rating') is not None else ''),
+        str(txn.get('API_Match', False))
+    ]
+    return '|'.join(row)
 
 def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt'):
     """
     Saves enriched transactions back to file with new API columns.
     """
-    header = [
-        "TransactionID", "Date", "ProductID", "ProductName", "Quantity", 
-        "UnitPrice", "CustomerID", "Region", "API_Category", "API_Brand", 
-        "API_Rating", "API_Match"
-    ]
-    
     try:
         # Ensure directory exists
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
         
         with open(filename, 'w', encoding='utf-8') as f:
             # Write Header
-            f.write('|'.join(header) + '\n')
+            f.write('|'.join(ENRICHED_HEADER) + '\n')
             
             # Write Data
             for txn in enriched_transactions:
-                row = [
-                    str(txn.get('TransactionID', '')),
-                    str(txn.get('Date', '')),
-                    str(txn.get('ProductID', '')),
-                    str(txn.get('ProductName', '')),
-                    str(txn.get('Quantity', '')),
-                    str(txn.get('UnitPrice', '')),
-                    str(txn.get('CustomerID', '')),
-                    str(txn.get('Region', '')),
-                    str(txn.get('API_Category', '') if txn.get('API_Category') is not None else ''),
-                    str(txn.get('API_Brand', '') if txn.get('API_Brand') is not None else ''),
-                    str(txn.get('API_Rating', '') if txn.get('API_Rating') is not None else ''),
-                    str(txn.get('API_Match', False))
-                ]
-                f.write('|'.join(row) + '\n')
+                f.write(format_enriched_row(txn) + '\n')
                 
         print(f"[File] Successfully saved enriched data to {filename}")
         
     except Exception as e:
-        print(f"[File] Error saving enriched data: {e}") 
\ No newline at end of file
+        print(f"[File] Error saving enriched data: {e}")
\ No newline at end of file
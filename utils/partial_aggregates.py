@@ -0,0 +1,282 @@
+import json
+import os
+
+# ==========================================
+# Mergeable Partial Aggregates
+# ==========================================
+# The analyses and the report hold derived values (percentages, averages,
+# rounded totals, distinct counts), which can't be combined across shards.
+# A partial aggregate keeps only raw sums, counts and exact distinct sets, so
+# partials built on different machines merge into exactly the aggregates a
+# single run over all the data would have produced.
+
+PARTIAL_FORMAT = 'sales-partial-aggregate'
+PARTIAL_VERSION = 1
+
+
+def empty_partial():
+    """
+    Returns: a partial aggregate of no transactions (the identity for merge_partials)
+    """
+    return {
+        'shards': [],
+        'records': 0,
+        'revenue': 0.0,
+        'date_min': None,
+        'date_max': None,
+        'regions': {},    # region -> {'sales', 'count'}
+        'products': {},   # name -> {'qty', 'revenue'}, in order of first appearance
+        'customers': {},  # id -> {'spent', 'count', 'products' (set)}
+        'daily': {},      # date -> {'revenue', 'count', 'customers' (set)}
+        'enriched': 0,
+        'enrichment_total': 0,
+        'failed_products': set(),
+        'invalid': 0,
+        'duplicates': 0,
+        'conflicts': 0,
+    }
+
+
+def build_partial(transactions, enriched_transactions, summary=None):
+    """
+    Aggregates one shard of validated transactions.
+    summary: validation summary of the shard (supplies its name and invalid/duplicate counts)
+    Returns: partial aggregate dictionary
+    """
+    partial = add_to_partial(empty_partial(), transactions, enriched_transactions)
+    if summary:
+        attach_summary(partial, summary)
+    return partial
+
+
+def add_to_partial(partial, transactions, enriched_transactions):
+    """
+    Folds a batch of validated transactions (and their enriched versions) into
+    a partial aggregate in place, so a file can be aggregated as it streams by.
+    Returns: the updated partial aggregate
+    """
+    regions = partial['regions']
+    products = partial['products']
+    customers = partial['customers']
+    daily = partial['daily']
+
+    for t in transactions:
+        amount = t['Quantity'] * t['UnitPrice']
+        partial['revenue'] += amount
+
+        r = t['Region']
+        if r not in regions:
+            regions[r] = {'sales': 0.0, 'count': 0}
+        regions[r]['sales'] += amount
+        regions[r]['count'] += 1
+
+        p = t['ProductName']
+        if p not in products:
+            products[p] = {'qty': 0, 'revenue': 0.0}
+        products[p]['qty'] += t['Quantity']
+        products[p]['revenue'] += amount
+
+        c = t['CustomerID']
+        if c not in customers:
+            customers[c] = {'spent': 0.0, 'count': 0, 'products': set()}
+        customers[c]['spent'] += amount
+        customers[c]['count'] += 1
+        customers[c]['products'].add(p)
+
+        d = t['Date']
+        if d not in daily:
+            daily[d] = {'revenue': 0.0, 'count': 0, 'customers': set()}
+        daily[d]['revenue'] += amount
+        daily[d]['count'] += 1
+        daily[d]['customers'].add(c)
+
+    partial['records'] += len(transactions)
+    if daily:
+        partial['date_min'] = min(daily)
+        partial['date_max'] = max(daily)
+
+    partial['enriched'] += sum(1 for t in enriched_transactions if t.get('API_Match'))
+    partial['enrichment_total'] += len(enriched_transactions)
+    partial['failed_products'].update(t['ProductName'] for t in enriched_transactions if not t.get('API_Match'))
+
+    return partial
+
+
+def attach_summary(partial, summary):
+    """
+    Records which shard a partial aggregate covers and its invalid/duplicate counts.
+    """
+    partial['shards'] = [summary.get('input_file')]
+    for key in ('invalid', 'duplicates', 'conflicts'):
+        partial[key] = summary.get(key, 0)
+
+
+def merge_partials(partials):
+    """
+    Combines partial aggregates. Sums and counts are added and distinct sets
+    are unioned, so the order in which shards are merged doesn't change the result
+    (apart from the order of equal-ranked entries, which follows shard order).
+    Returns: new partial aggregate dictionary (the inputs are not modified)
+    """
+    merged = empty_partial()
+
+    for partial in partials:
+        merged['shards'].extend(partial['shards'])
+        for key in ('records', 'revenue', 'enriched', 'enrichment_total', 'invalid', 'duplicates', 'conflicts'):
+            merged[key] += partial[key]
+
+        if partial['date_min'] is not None:
+            if merged['date_min'] is None or partial['date_min'] < merged['date_min']:
+                merged['date_min'] = partial['date_min']
+            if merged['date_max'] is None or partial['date_max'] > merged['date_max']:
+                merged['date_max'] = partial['date_max']
+
+        for section, distinct in (('regions', None), ('products', None),
+                                  ('customers', 'products'), ('daily', 'customers')):
+            target = merged[section]
+            for key, stats in partial[section].items():
+                if key not in target:
+                    target[key] = {field: (set(value) if field == distinct else value)
+                                   for field, value in stats.items()}
+                    continue
+                for field, value in stats.items():
+                    if field == distinct:
+                        target[key][field] |= value
+                    else:
+                        target[key][field] += value
+
+        merged['failed_products'] |= partial['failed_products']
+
+    return merged
+
+
+# ==========================================
+# Serialization
+# ==========================================
+def save_partial(partial, filename):
+    """
+    Saves a partial aggregate as JSON (sets are stored as sorted lists).
+    """
+    data = dict(partial, format=PARTIAL_FORMAT, version=PARTIAL_VERSION)
+    data['customers'] = {
+        c: dict(stats, products=sorted(stats['products'])) for c, stats in partial['customers'].items()
+    }
+    data['daily'] = {
+        d: dict(stats, customers=sorted(stats['customers'])) for d, stats in partial['daily'].items()
+    }
+    data['failed_products'] = sorted(partial['failed_products'])
+
+    try:
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        print(f"[File] Successfully saved partial aggregate to {filename}")
+    except Exception as e:
+        print(f"[File] Error saving partial aggregate: {e}")
+
+
+def load_partial(filename):
+    """
+    Loads a partial aggregate saved by save_partial().
+    Raises: ValueError if the file is not a partial aggregate of a supported version.
+    Returns: partial aggregate dictionary
+    """
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        data = None
+
+    if not isinstance(data, dict) or data.get('format') != PARTIAL_FORMAT:
+        raise ValueError(f"'{filename}' is not a partial aggregate file")
+    if data.get('version') != PARTIAL_VERSION:
+        raise ValueError(f"'{filename}' has partial aggregate version {data.get('version')}, "
+                         f"expected {PARTIAL_VERSION}")
+
+    partial = empty_partial()
+    partial.update({key: data[key] for key in partial})
+    for stats in partial['customers'].values():
+        stats['products'] = set(stats['products'])
+    for stats in partial['daily'].values():
+        stats['customers'] = set(stats['customers'])
+    partial['failed_products'] = set(partial['failed_products'])
+    return partial
+
+
+# ==========================================
+# Final Results
+# ==========================================
+def partial_analyses(partial, n=5):
+    """
+    Derives the analyses from a (merged) partial aggregate.
+    Returns: dictionary of analysis name -> result, as pipeline.run_analyses() returns
+    """
+    total_revenue = partial['revenue']
+
+    regions = {
+        r: {
+            'total_sales': round(stats['sales'], 2),
+            'transaction_count': stats['count'],
+            'percentage': round((stats['sales'] / total_revenue) * 100 if total_revenue > 0 else 0, 2)
+        }
+        for r, stats in partial['regions'].items()
+    }
+
+    top_products = [(p, stats['qty'], round(stats['revenue'], 2)) for p, stats in partial['products'].items()]
+    top_products.sort(key=lambda x: x[1], reverse=True)
+
+    customers = {
+        c: {
+            'total_spent': round(stats['spent'], 2),
+            'purchase_count': stats['count'],
+            'avg_order_value': round(stats['spent'] / stats['count'] if stats['count'] > 0 else 0, 2),
+            'products_bought': sorted(stats['products'])
+        }
+        for c, stats in partial['customers'].items()
+    }
+
+    return {
+        'total_revenue': total_revenue,
+        'region_wise_sales': dict(sorted(regions.items(), key=lambda item: item[1]['total_sales'], reverse=True)),
+        'top_selling_products': top_products[:n],
+        'customer_analysis': dict(sorted(customers.items(), key=lambda item: item[1]['total_spent'], reverse=True)),
+        'daily_sales_trend': {
+            d: {
+                'revenue': round(partial['daily'][d]['revenue'], 2),
+                'transaction_count': partial['daily'][d]['count'],
+                'unique_customers': len(partial['daily'][d]['customers'])
+            }
+            for d in sorted(partial['daily'])
+        },
+    }
+
+
+def partial_report_data(partial):
+    """
+    Derives the report aggregates from a (merged) partial aggregate.
+    Returns: dictionary of report aggregates, as report_generator.build_report_data() returns
+    """
+    products = partial['products']
+    customers = partial['customers']
+    daily = partial['daily']
+
+    sorted_regions = sorted(partial['regions'].items(), key=lambda x: x[1]['sales'], reverse=True)
+    sorted_prods = sorted(products.items(), key=lambda x: x[1]['qty'], reverse=True)[:5]
+    sorted_cust = sorted(customers.items(), key=lambda x: x[1]['spent'], reverse=True)[:5]
+
+    return {
+        'total_records': partial['records'],
+        'total_revenue': partial['revenue'],
+        'date_range': (partial['date_min'], partial['date_max']) if partial['date_min'] is not None else None,
+        'regions': [(r, data['sales'], data['count']) for r, data in sorted_regions],
+        'top_products': [(p, data['qty'], data['revenue']) for p, data in sorted_prods],
+        'top_customers': [(c, data['spent'], data['count']) for c, data in sorted_cust],
+        'daily': [
+            (d, daily[d]['revenue'], daily[d]['count'], len(daily[d]['customers']))
+            for d in sorted(daily)
+        ],
+        'low_performers': [p for p, data in products.items() if data['qty'] < 5],
+        'enriched_count': partial['enriched'],
+        'enrichment_total': partial['enrichment_total'],
+        'failed_products': sorted(partial['failed_products']),
+    }
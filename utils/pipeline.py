@@ -0,0 +1,330 @@
+import os
+
+from utils.file_handler import read_sales_data, parse_transactions, validate_and_filter, filter_transactions
+from utils.data_processor import (
+    calculate_total_revenue, region_wise_sales, top_selling_products,
+    customer_analysis, daily_sales_trend, enrich_transaction, enrich_sales_data
+)
+from utils.report_generator import generate_sales_report
+
+DEFAULT_INPUT = 'data/sales_data.txt'
+DEFAULT_ENRICHED = 'data/enriched_sales_data.txt'
+DEFAULT_REPORT = 'output/sales_report.txt'
+
+# Suffixes dropped along with the extension when naming batch outputs
+COMPRESSED_EXTENSIONS = ('.gz', '.bz2', '.xz', '.zst')
+
+# ==========================================
+# Pipeline Stages
+# ==========================================
+def _no_wrap(func):
+    return func
+
+
+def load_product_mapping():
+    """
+    Fetches the product catalog once so it can be shared by every input file.
+    Returns: dictionary mapping ID (int) -> product info (dict)
+    """
+    from utils.api_handler import fetch_all_products, create_product_mapping
+
+    api_products = fetch_all_products()
+
+    if not api_products:
+        print("Warning: API fetch failed. Enrichment will be skipped.")
+
+    return create_product_mapping(api_products)
+
+
+def run_analyses(transactions):
+    """
+    Runs the core analyses over validated transactions.
+    Returns: dictionary of analysis name -> result
+    """
+    return {
+        'total_revenue': calculate_total_revenue(transactions),
+        'region_wise_sales': region_wise_sales(transactions),
+        'top_selling_products': top_selling_products(transactions),
+        'customer_analysis': customer_analysis(transactions),
+        'daily_sales_trend': daily_sales_trend(transactions),
+    }
+
+
+def output_paths(input_file, enriched_file, report_file, batch=False):
+    """
+    Works out where the outputs of one input file go.
+    In batch mode the input file name is prefixed so files don't overwrite each other.
+    Returns: tuple (enriched_file, report_file)
+    """
+    if not batch:
+        return enriched_file, report_file
+
+    # Drop only the extension (and a compression suffix), so names like
+    # sales.2024-01-01.txt.gz and sales.2024-01-02.txt stay distinct
+    stem, ext = os.path.splitext(os.path.basename(input_file))
+    if ext.lower() in COMPRESSED_EXTENSIONS:
+        stem = os.path.splitext(stem)[0]
+
+    def prefixed(path):
+        return os.path.join(os.path.dirname(path), f"{stem}_{os.path.basename(path)}")
+
+    return prefixed(enriched_file), prefixed(report_file)
+
+
+def output_collisions(input_files, enriched_file, report_file):
+    """
+    Finds batch inputs whose outputs would overwrite each other
+    (e.g. a/sales.txt and b/sales.txt).
+    Returns: list of (output_file, [input files]) for every clash
+    """
+    writers = {}
+    for input_file in input_files:
+        for path in output_paths(input_file, enriched_file, report_file, batch=True):
+            writers.setdefault(os.path.normpath(path), []).append(input_file)
+    return [(path, files) for path, files in writers.items() if len(files) > 1]
+
+
+def load_transactions(input_file, region=None, min_amount=None, max_amount=None, stage=_no_wrap):
+    """
+    Runs read -> parse -> validate for one file. Needs no product catalog.
+    Returns: tuple (valid_transactions, summary), or None if nothing could be read.
+    """
+    raw_lines = read_sales_data(input_file)
+    if not raw_lines:
+        print(f"Error: No data found in {input_file}.")
+        return None
+
+    # Every record stays in memory until the report is written, so interning pays off here
+    parsed_transactions = stage(parse_transactions)(raw_lines, intern_strings=True)
+
+    valid_transactions, invalid_count, summary = validate_and_filter(
+        parsed_transactions,
+        region=region,
+        min_amount=min_amount,
+        max_amount=max_amount
+    )
+
+    summary.update({
+        'input_file': input_file,
+        'read': len(raw_lines),
+        'parsed': len(parsed_transactions),
+    })
+    return valid_transactions, summary
+
+
+def load_filters(filters, db_path=None):
+    """
+    Returns: the filters load_transactions() should apply. With SQLite every
+             validated row is stored and the filters are applied by the queries
+             instead (see finish_file), so none are applied while loading.
+    """
+    return (None, None, None) if db_path else tuple(filters)
+
+
+def finish_file(valid_transactions, summary, product_mapping, enriched_file=DEFAULT_ENRICHED,
+                report_file=DEFAULT_REPORT, formats=('text',), stage=_no_wrap, db_path=None,
+                filters=(None, None, None)):
+    """
+    Runs analyse -> enrich -> report for transactions returned by load_transactions().
+    filters: tuple (region, min_amount, max_amount); only used with db_path, where
+             load_transactions() was called without them (see load_filters).
+    Returns: the summary dictionary, updated with enrichment and output details.
+    """
+    db_transactions = None
+    if db_path:
+        # Every validated row goes into the database; the outputs get the filtered ones
+        db_transactions = [enrich_transaction(t, product_mapping) for t in valid_transactions]
+        valid_transactions, by_region, by_amount = filter_transactions(valid_transactions, *filters)
+        summary.update({
+            'filtered_by_region': by_region,
+            'filtered_by_amount': by_amount,
+            'final_count': len(valid_transactions),
+        })
+
+    enriched_transactions = stage(enrich_sales_data)(valid_transactions, product_mapping, enriched_file)
+    summary['enriched_file'] = enriched_file
+
+    return write_reports(valid_transactions, enriched_transactions, summary, report_file,
+                         formats, stage, db_path, filters, db_transactions)
+
+
+def write_reports(valid_transactions, enriched_transactions, summary, report_file=DEFAULT_REPORT,
+                  formats=('text',), stage=_no_wrap, db_path=None, filters=(None, None, None),
+                  db_transactions=None, partial=None):
+    """
+    Runs the analyses and writes the report in the requested formats.
+    db_path: if given, db_transactions (every validated row of the file, enriched)
+             are loaded into SQLite and the analyses and report are answered by
+             indexed queries, with the filters as WHERE clauses. Pass
+             db_transactions=None if the caller has already loaded the rows.
+    partial: running partial aggregate of the filtered transactions (staged
+             mode); the analyses and report are derived from it instead of from
+             the transaction lists, which may then be empty.
+    Returns: the summary dictionary, updated with enrichment and output details.
+    """
+    report_data = None
+
+    if partial is not None:
+        from utils.partial_aggregates import attach_summary, partial_analyses, partial_report_data
+
+        attach_summary(partial, summary)
+        enriched_count = partial['enriched']
+    else:
+        enriched_count = sum(1 for t in enriched_transactions if t.get('API_Match'))
+
+    if db_path:
+        from utils import sqlite_store
+
+        source = os.path.abspath(summary['input_file'])
+        conn = sqlite_store.connect(db_path)
+        try:
+            if db_transactions is not None:
+                sqlite_store.load_transactions(conn, db_transactions, source)
+            analyses = sqlite_store.run_analyses(conn, source, filters)
+            report_data = sqlite_store.report_data(conn, source, filters)
+        finally:
+            conn.close()
+    elif partial is not None:
+        analyses = partial_analyses(partial)
+        report_data = partial_report_data(partial)
+    else:
+        analyses = run_analyses(valid_transactions)
+
+    if 'text' in formats:
+        stage(generate_sales_report)(valid_transactions, enriched_transactions, report_file,
+                                     report_data=report_data)
+
+    if 'json' in formats:
+        json_file = os.path.splitext(report_file)[0] + '.json'
+        save_analyses_json(analyses, summary, json_file)
+
+    if 'partial' in formats:
+        from utils.partial_aggregates import build_partial, save_partial
+
+        summary['partial_file'] = partial_path(report_file)
+        if partial is None:
+            partial = build_partial(valid_transactions, enriched_transactions, summary)
+        save_partial(partial, summary['partial_file'])
+
+    summary.update({
+        'enriched': enriched_count,
+        'report_file': report_file,
+        'analyses': analyses,
+    })
+    return summary
+
+
+def process_file(input_file, product_mapping, enriched_file=DEFAULT_ENRICHED,
+                 report_file=DEFAULT_REPORT, region=None, min_amount=None,
+                 max_amount=None, formats=('text',), stage=_no_wrap, db_path=None):
+    """
+    Runs read -> parse -> validate -> analyse -> enrich -> report for one file.
+    stage: optional wrapper applied to each stage function (used for profiling).
+    Returns: summary dictionary for the file, or None if nothing could be read.
+    """
+    filters = (region, min_amount, max_amount)
+    loaded = load_transactions(input_file, *load_filters(filters, db_path), stage=stage)
+    if loaded is None:
+        return None
+
+    valid_transactions, summary = loaded
+    return finish_file(valid_transactions, summary, product_mapping,
+                       enriched_file, report_file, formats, stage, db_path, filters)
+
+
+def report_from_db(db_path, report_file=DEFAULT_REPORT, formats=('text',), stage=_no_wrap,
+                   filters=(None, None, None)):
+    """
+    Builds the analyses and report over everything loaded into the database,
+    without reading or parsing any text files.
+    filters: tuple (region, min_amount, max_amount) applied to the whole history
+    Returns: summary dictionary
+    """
+    from utils import sqlite_store
+
+    conn = sqlite_store.connect(db_path)
+    try:
+        analyses = sqlite_store.run_analyses(conn, filters=filters)
+        report_data = sqlite_store.report_data(conn, filters=filters)
+    finally:
+        conn.close()
+
+    summary = {
+        'input_file': db_path,
+        'invalid': 0,
+        'final_count': report_data['total_records'],
+        'enriched': report_data['enriched_count'],
+        'report_file': report_file,
+    }
+
+    if 'text' in formats:
+        stage(generate_sales_report)([], [], report_file, report_data=report_data)
+
+    if 'json' in formats:
+        json_file = os.path.splitext(report_file)[0] + '.json'
+        save_analyses_json(analyses, summary, json_file)
+
+    return summary
+
+
+def report_from_partials(partial_files, report_file=DEFAULT_REPORT, formats=('text',), stage=_no_wrap):
+    """
+    Reduce step for sharded runs: merges the partial aggregates written by each
+    shard (--format partial) and builds the combined analyses and report,
+    without reading any sales files.
+    Returns: summary dictionary
+    """
+    from utils.partial_aggregates import (
+        load_partial, merge_partials, partial_analyses, partial_report_data, save_partial
+    )
+
+    merged = merge_partials(load_partial(f) for f in partial_files)
+    print(f"[Reduce] Merged {len(partial_files)} partial aggregate(s) covering {merged['records']} records")
+
+    analyses = partial_analyses(merged)
+    report_data = partial_report_data(merged)
+
+    summary = {
+        'input_file': ', '.join(str(s) for s in merged['shards']),
+        'invalid': merged['invalid'],
+        'duplicates': merged['duplicates'],
+        'conflicts': merged['conflicts'],
+        'final_count': merged['records'],
+        'enriched': merged['enriched'],
+        'report_file': report_file,
+    }
+
+    if 'text' in formats:
+        stage(generate_sales_report)([], [], report_file, report_data=report_data)
+
+    if 'json' in formats:
+        json_file = os.path.splitext(report_file)[0] + '.json'
+        save_analyses_json(analyses, summary, json_file)
+
+    # The merged aggregate can itself be reduced again (e.g. per-region, then global)
+    if 'partial' in formats:
+        save_partial(merged, partial_path(report_file))
+
+    return summary
+
+
+def partial_path(report_file):
+    """
+    Returns: where the partial aggregate for a report is written (next to the report).
+    """
+    return os.path.splitext(report_file)[0] + '.partial.json'
+
+
+def save_analyses_json(analyses, summary, filename):
+    """
+    Saves the analysis results and validation summary as JSON.
+    """
+    import json
+
+    try:
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'analyses': analyses}, f, indent=2)
+        print(f"[File] Successfully saved analysis JSON to {filename}")
+    except Exception as e:
+        print(f"[File] Error saving analysis JSON: {e}")
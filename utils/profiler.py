@@ -0,0 +1,334 @@
+import cProfile
+import multiprocessing
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+# Stages that can be profiled individually from the entry point
+PROFILE_STAGES = ('parse_transactions', 'enrich_sales_data', 'generate_sales_report')
+PROFILE_MODES = ('cprofile', 'sampling')
+
+# From Python 3.12 cProfile is built on sys.monitoring: one profiler sees every
+# thread, and only one can be enabled at a time in the whole process
+CPROFILE_IS_PROCESS_WIDE = sys.version_info >= (3, 12)
+
+# ==========================================
+# Sampling Profiler (low overhead)
+# ==========================================
+def _stack_of(frame, thread_name):
+    # Root first, leaf last
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        file_name = os.path.basename(code.co_filename)
+        stack.append(f"{code.co_name} ({file_name}:{code.co_firstlineno})")
+        frame = frame.f_back
+    stack.append(f"thread {thread_name}")
+    return ';'.join(reversed(stack))
+
+
+class SamplingProfiler:
+    """
+    Periodically samples the call stacks of every thread from a background thread.
+    Each stack is rooted at a "thread <name>" frame, so worker threads (staged
+    stages, async executor threads) show up separately.
+    Output is written in the collapsed-stack format used by flamegraph.pl,
+    speedscope and inferno ("frame;frame;frame count" per line).
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self.samples[_stack_of(frame, names.get(thread_id, thread_id))] += 1
+
+    def dump(self, filename):
+        _write_folded(self.samples, filename)
+
+
+class StageSampler:
+    """
+    Samples only the threads that are currently inside a profiled stage, and
+    files each sample under that stage. One sampler ticks at a fixed interval
+    for the rest of the process, independent of when stages start, so short
+    calls such as per-batch stages are sampled in proportion to their time.
+    The sampler thread rewrites a stage's file whenever it gets new samples, so
+    the profiled threads do no I/O of their own (which would hand the sampler
+    the GIL exactly when they are outside the stage).
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = {}  # stage name -> Counter of stacks
+        self._files = {}   # stage name -> output file
+        self._active = {}  # thread id -> stage name
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def enter(self, name, out_file):
+        """
+        Marks the calling thread as inside the stage until leave().
+        Returns: True on the stage's first call
+        """
+        with self._lock:
+            self._active[threading.get_ident()] = name
+            first_call = name not in self.samples
+            if first_call:
+                self.samples[name] = Counter()
+                self._files[name] = out_file
+            if self._thread is None:
+                # The sampler can only look while it holds the GIL. With the default
+                # 5 ms switch interval it mostly gets it when a stage thread blocks
+                # on a queue, i.e. between calls, so short calls would never be seen.
+                sys.setswitchinterval(min(sys.getswitchinterval(), self.interval / 10))
+                self._thread = threading.Thread(target=self._run, name='stage-sampler', daemon=True)
+                self._thread.start()
+        return first_call
+
+    def leave(self):
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                names = {t.ident: t.name for t in threading.enumerate()}
+                updated = {}
+                for thread_id, name in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        self.samples[name][_stack_of(frame, names.get(thread_id, thread_id))] += 1
+                        updated[name] = (Counter(self.samples[name]), self._files[name])
+            for samples, out_file in updated.values():
+                # Written to a temporary file first: the process may exit mid-write
+                _write_folded(samples, out_file + '.tmp')
+                os.replace(out_file + '.tmp', out_file)
+
+
+def _write_folded(samples, filename):
+    with open(filename, 'w', encoding='utf-8') as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+# ==========================================
+# cProfile Across Threads
+# ==========================================
+class ThreadedProfile:
+    """
+    cProfile for the calling thread and every thread started while it runs.
+    Before Python 3.12 a cProfile.Profile only sees the thread that enabled it,
+    so each new thread gets its own, installed through threading.setprofile
+    and merged when the run stops.
+    """
+
+    def __init__(self):
+        self.profilers = []
+        self._lock = threading.Lock()
+
+    def _enable_new(self):
+        profiler = cProfile.Profile()
+        with self._lock:
+            self.profilers.append(profiler)
+        profiler.enable()
+
+    def _thread_hook(self, frame, event, arg):
+        # First event in a new thread: replace this hook with a real profiler
+        sys.setprofile(None)
+        self._enable_new()
+
+    def start(self):
+        if not CPROFILE_IS_PROCESS_WIDE:
+            threading.setprofile(self._thread_hook)
+        self._enable_new()
+
+    def stop(self):
+        """
+        Returns: pstats.Stats merged over every profiled thread.
+        """
+        if not CPROFILE_IS_PROCESS_WIDE:
+            threading.setprofile(None)
+        self.profilers[0].disable()
+        stats = pstats.Stats(self.profilers[0])
+        for profiler in self.profilers[1:]:
+            stats.add(profiler)
+        return stats
+
+
+# ==========================================
+# Profiling Helpers
+# ==========================================
+# Results of every call profiled so far, per output file. A stage runs once
+# per input file (or per batch in staged mode), so calls are merged instead of
+# each one overwriting the last.
+_accumulated = {}
+_accumulated_lock = threading.Lock()
+
+# Only one cProfile can be enabled at a time on Python 3.12+, so stages running
+# in different threads are profiled one after another
+_cprofile_guard = threading.Lock() if CPROFILE_IS_PROCESS_WIDE else None
+
+# One per process: a forked worker doesn't inherit its parent's sampler thread
+_stage_sampler = None
+_stage_sampler_pid = None
+_stage_sampler_lock = threading.Lock()
+
+
+def _profile_file(output_dir, name, extension):
+    # Worker processes (--backend process) each write their own file
+    worker = multiprocessing.current_process().name != 'MainProcess'
+    suffix = f"_{os.getpid()}" if worker else ''
+    return os.path.join(output_dir, f"profile_{name}{suffix}.{extension}")
+
+
+def _save_cprofile(stats, name, output_dir, start, note=''):
+    out_file = _profile_file(output_dir, name, 'pstats')
+    with _accumulated_lock:
+        first_call = out_file not in _accumulated
+        if first_call:
+            os.makedirs(output_dir, exist_ok=True)
+            _accumulated[out_file] = stats
+        else:
+            _accumulated[out_file].add(stats)
+        _accumulated[out_file].dump_stats(out_file)
+    if first_call:
+        elapsed = time.perf_counter() - start
+        print(f"[Profile] {name}: {elapsed:.3f}s -> {out_file}{note}")
+
+
+def _get_stage_sampler():
+    global _stage_sampler, _stage_sampler_pid
+    with _stage_sampler_lock:
+        if _stage_sampler is None or _stage_sampler_pid != os.getpid():
+            _stage_sampler = StageSampler()
+            _stage_sampler_pid = os.getpid()
+        return _stage_sampler
+
+
+def run_profiled(func, name, mode='cprofile', output_dir='output', *args, **kwargs):
+    """
+    Runs a whole run, func(*args, **kwargs), under the chosen profiler and dumps
+    the results. Every thread is profiled, so the work of worker threads (async
+    and staged modes) is included.
+    cprofile -> output/profile_<name>.pstats (load with pstats, snakeviz, flameprof)
+    sampling -> output/profile_<name>.folded (collapsed stacks for flamegraphs)
+    Returns: whatever func returns.
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profiler '{mode}'. Choose from: {', '.join(PROFILE_MODES)}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    if mode == 'cprofile':
+        profiler = ThreadedProfile()
+        profiler.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _save_cprofile(profiler.stop(), name, output_dir, start)
+    else:
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.stop()
+            out_file = _profile_file(output_dir, name, 'folded')
+            profiler.dump(out_file)
+            elapsed = time.perf_counter() - start
+            print(f"[Profile] {name}: {elapsed:.3f}s, {sum(profiler.samples.values())} samples -> {out_file}")
+
+
+def profile_stage(func, name, mode='cprofile', output_dir='output'):
+    """
+    Wraps a pipeline stage so every call to it is profiled, in the thread that
+    makes the call, and merged with earlier calls of the same stage.
+    On Python 3.12+ cProfile sees every thread, so a stage's profile can also
+    contain work other threads did while it ran.
+    Returns: the wrapped function.
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profiler '{mode}'. Choose from: {', '.join(PROFILE_MODES)}")
+
+    if mode == 'cprofile':
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            if _cprofile_guard is not None:
+                _cprofile_guard.acquire()
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.disable()
+                if _cprofile_guard is not None:
+                    _cprofile_guard.release()
+                _save_cprofile(pstats.Stats(profiler), name, output_dir, start, " (later calls are added to it)")
+    else:
+        out_file = _profile_file(output_dir, name, 'folded')
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            sampler = _get_stage_sampler()
+            if sampler.enter(name, out_file):
+                os.makedirs(output_dir, exist_ok=True)
+                _write_folded(Counter(), out_file)
+                print(f"[Profile] {name}: sampling -> {out_file} (written as samples come in)")
+            try:
+                return func(*args, **kwargs)
+            finally:
+                sampler.leave()
+
+    return wrapper
+
+
+def parse_profile_stages(value):
+    """
+    Parses a comma-separated stage list ('all', 'pipeline' or stage names).
+    'pipeline' profiles the whole run and can't be combined with stages, since
+    a stage profiler would stop (or, on Python 3.12+, clash with) the run's profiler.
+    Returns: set of stage names, or {'pipeline'}
+    """
+    if not value:
+        return set()
+
+    stages = {s.strip() for s in value.split(',') if s.strip()}
+    if 'pipeline' in stages and len(stages) > 1:
+        raise ValueError("'pipeline' profiles the whole run and can't be combined with other stages")
+    if 'all' in stages:
+        return set(PROFILE_STAGES)
+
+    unknown = stages - set(PROFILE_STAGES) - {'pipeline'}
+    if unknown:
+        raise ValueError(f"Unknown profile stage(s): {', '.join(sorted(unknown))}")
+
+    return stages
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+
+# ==========================================
+# Content-Addressed Result Cache
+# ==========================================
+# Results are keyed by a fingerprint of the input file, the filter arguments
+# and the product catalog version, so an unchanged rerun can skip parsing,
+# validation, enrichment and report generation entirely.
+
+# Bump when the cached value format changes so old entries are ignored
+CACHE_VERSION = 3
+
+
+def _sha256_file(path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _save_json(path, data):
+    # Write to a temporary file first so a crash never leaves a half-written index
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class ResultCache:
+    """
+    On-disk cache of pickled results with size-bounded LRU eviction.
+    An entry's mtime is its last use; the least recently used entries are
+    deleted once the cache grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir='output/.cache', max_bytes=64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.entries_dir = os.path.join(cache_dir, 'results')
+        self.index_file = os.path.join(cache_dir, 'fingerprints.json')
+        os.makedirs(self.entries_dir, exist_ok=True)
+
+    # --- Fingerprints ---
+    def file_fingerprint(self, path):
+        """
+        Fingerprints a file by content hash. If size and mtime are unchanged since
+        the last run, the stored hash is reused (fast path); otherwise the file is rehashed.
+        Returns: hex digest string
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        index = _load_json(self.index_file, {})
+
+        known = index.get(path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['sha256']
+
+        sha256 = _sha256_file(path)
+        index[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+        _save_json(self.index_file, index)
+        return sha256
+
+    @staticmethod
+    def make_key(input_fingerprint, filters, catalog_version):
+        """
+        Combines the input fingerprint, filter arguments and catalog version into a cache key.
+        Returns: hex digest string
+        """
+        payload = json.dumps([CACHE_VERSION, input_fingerprint, list(filters), catalog_version])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # --- Entries ---
+    def _entry_path(self, key):
+        return os.path.join(self.entries_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """
+        Returns: the cached value, or None on a miss.
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+        # Mark as recently used
+        os.utime(path, None)
+        return value
+
+    def put(self, key, value):
+        """
+        Stores a value and evicts least recently used entries beyond max_bytes.
+        """
+        path = self._entry_path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Deletes least recently used entries until the cache fits in max_bytes.
+        Returns: number of entries removed
+        """
+        entries = []
+        for name in os.listdir(self.entries_dir):
+            if not name.endswith('.pkl'):
+                continue
+            stat = os.stat(os.path.join(self.entries_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.entries_dir, name))
+            total -= size
+            removed += 1
+        return removed
+
+
+# ==========================================
+# Product Catalog Cache
+# ==========================================
+def catalog_version(product_mapping):
+    """
+    Returns: hex digest identifying the catalog contents.
+    """
+    payload = json.dumps(sorted(product_mapping.items(), key=lambda x: str(x[0])), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_catalog_cached(fetch, cache_dir='output/.cache', ttl=3600):
+    """
+    Returns the product mapping, reusing the copy saved by an earlier run if it
+    is younger than ttl seconds; otherwise calls fetch() and saves the result.
+    Returns: dictionary mapping ID (int) -> product info (dict)
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    catalog_file = os.path.join(cache_dir, 'catalog.json')
+
+    cached = _load_json(catalog_file, None)
+    if cached and time.time() - cached['fetched_at'] < ttl:
+        print(f"[Cache] Using product catalog saved {time.time() - cached['fetched_at']:.0f}s ago")
+        return {int(k): v for k, v in cached['products'].items() if k.isdigit()}
+
+    product_mapping = fetch()
+
+    # An empty catalog means the API call failed, so don't keep it
+    if product_mapping:
+        _save_json(catalog_file, {'fetched_at': time.time(), 'products': product_mapping})
+    return product_mapping
@@ -0,0 +1,303 @@
+import os
+import sqlite3
+
+# ==========================================
+# SQLite Storage Backend
+# ==========================================
+# Validated (and enriched) transactions are bulk-loaded into an indexed table so
+# repeated analytics over months of history come from GROUP BY queries instead
+# of re-parsing the text files. The query functions return the same shapes as
+# their data_processor / report_generator counterparts.
+#
+# Every validated row is stored, whatever --region / --min-amount / --max-amount
+# say; the filters are applied as WHERE clauses when querying, so a filtered
+# run never drops the rest of a file's history.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    TransactionID TEXT NOT NULL,
+    Date          TEXT NOT NULL,
+    ProductID     TEXT NOT NULL,
+    ProductName   TEXT NOT NULL,
+    Quantity      INTEGER NOT NULL,
+    UnitPrice     REAL NOT NULL,
+    CustomerID    TEXT NOT NULL,
+    Region        TEXT NOT NULL,
+    API_Category  TEXT,
+    API_Brand     TEXT,
+    API_Rating    REAL,
+    API_Match     INTEGER NOT NULL DEFAULT 0,
+    Source        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_region ON transactions (Region);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (Date);
+CREATE INDEX IF NOT EXISTS idx_transactions_product ON transactions (ProductID);
+CREATE INDEX IF NOT EXISTS idx_transactions_customer ON transactions (CustomerID);
+CREATE INDEX IF NOT EXISTS idx_transactions_source ON transactions (Source);
+"""
+
+INSERT_SQL = """
+INSERT INTO transactions (
+    TransactionID, Date, ProductID, ProductName, Quantity, UnitPrice,
+    CustomerID, Region, API_Category, API_Brand, API_Rating, API_Match, Source
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def connect(db_path='data/sales.db'):
+    """
+    Opens (and creates if needed) the sales database.
+    Returns: sqlite3.Connection
+    """
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    # A generous timeout lets batch workers wait for each other's write locks
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def load_transactions(conn, transactions, source):
+    """
+    Bulk-loads the validated (unfiltered) transactions of one source file in a
+    single database transaction. Rows previously loaded from the same source are
+    replaced, so reruns don't double count.
+    Returns: number of rows loaded
+    """
+    with conn:
+        clear_source(conn, source)
+        count = insert_transactions(conn, transactions, source)
+
+    print(f"[DB] Loaded {count} transactions from {source}")
+    return count
+
+
+def clear_source(conn, source):
+    """
+    Deletes the rows previously loaded from a source file. Together with
+    insert_transactions() this lets a file be loaded batch by batch; nothing is
+    committed until the caller commits (or leaves a `with conn:` block).
+    """
+    conn.execute("DELETE FROM transactions WHERE Source = ?", (source,))
+
+
+def insert_transactions(conn, transactions, source):
+    """
+    Inserts a batch of validated (unfiltered) transactions from one source file.
+    Returns: number of rows inserted
+    """
+    rows = [
+        (
+            t['TransactionID'], t['Date'], t['ProductID'], t['ProductName'],
+            t['Quantity'], t['UnitPrice'], t['CustomerID'], t['Region'],
+            t.get('API_Category'), t.get('API_Brand'), t.get('API_Rating'),
+            1 if t.get('API_Match') else 0, source
+        )
+        for t in transactions
+    ]
+    conn.executemany(INSERT_SQL, rows)
+    return len(rows)
+
+
+def _where(source, extra=None, filters=None):
+    """
+    Builds a WHERE clause restricted to one source file (None = all history)
+    and to the optional filters, a tuple (region, min_amount, max_amount) with
+    the same meaning as in validate_and_filter.
+    Returns: tuple (sql, params)
+    """
+    clauses = [extra] if extra else []
+    params = []
+    if source is not None:
+        clauses.append("Source = ?")
+        params.append(source)
+
+    region, min_amount, max_amount = filters or (None, None, None)
+    if region:
+        clauses.append("LOWER(Region) = LOWER(?)")
+        params.append(region)
+    if min_amount is not None:
+        clauses.append("Quantity * UnitPrice >= ?")
+        params.append(min_amount)
+    if max_amount is not None:
+        clauses.append("Quantity * UnitPrice <= ?")
+        params.append(max_amount)
+    sql = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return sql, params
+
+
+# ==========================================
+# Analytics Queries
+# ==========================================
+def calculate_total_revenue(conn, source=None, filters=None):
+    """
+    Returns: float (total revenue)
+    """
+    where, params = _where(source, filters=filters)
+    row = conn.execute(f"SELECT COALESCE(SUM(Quantity * UnitPrice), 0.0) FROM transactions{where}", params).fetchone()
+    return row[0]
+
+
+def region_wise_sales(conn, source=None, filters=None):
+    """
+    Returns: dictionary with region statistics sorted by total_sales desc.
+    """
+    total_revenue = calculate_total_revenue(conn, source, filters)
+    where, params = _where(source, filters=filters)
+    rows = conn.execute(f"""
+        SELECT Region, SUM(Quantity * UnitPrice) AS sales, COUNT(*)
+        FROM transactions{where}
+        GROUP BY Region
+        ORDER BY sales DESC
+    """, params).fetchall()
+
+    final_stats = {}
+    for region, sales, count in rows:
+        percentage = (sales / total_revenue) * 100 if total_revenue > 0 else 0
+        final_stats[region] = {
+            'total_sales': round(sales, 2),
+            'transaction_count': count,
+            'percentage': round(percentage, 2)
+        }
+    return final_stats
+
+
+def top_selling_products(conn, n=5, source=None, filters=None):
+    """
+    Returns: list of tuples (ProductName, TotalQuantity, TotalRevenue)
+    """
+    where, params = _where(source, filters=filters)
+    rows = conn.execute(f"""
+        SELECT ProductName, SUM(Quantity) AS qty, SUM(Quantity * UnitPrice)
+        FROM transactions{where}
+        GROUP BY ProductName
+        ORDER BY qty DESC, MIN(rowid)
+        LIMIT ?
+    """, params + [n]).fetchall()
+    return [(name, qty, round(revenue, 2)) for name, qty, revenue in rows]
+
+
+def customer_analysis(conn, source=None, filters=None):
+    """
+    Returns: dictionary of customer statistics sorted by total_spent desc.
+    """
+    where, params = _where(source, filters=filters)
+    # ProductName never contains commas (parse_transactions strips them), so the
+    # default GROUP_CONCAT separator is safe to split on
+    rows = conn.execute(f"""
+        SELECT CustomerID, SUM(Quantity * UnitPrice) AS spent, COUNT(*),
+               GROUP_CONCAT(DISTINCT ProductName)
+        FROM transactions{where}
+        GROUP BY CustomerID
+        ORDER BY spent DESC, MIN(rowid)
+    """, params).fetchall()
+
+    final_cust_stats = {}
+    for cid, spent, count, products in rows:
+        final_cust_stats[cid] = {
+            'total_spent': round(spent, 2),
+            'purchase_count': count,
+            'avg_order_value': round(spent / count, 2) if count > 0 else 0,
+            'products_bought': products.split(',') if products else []
+        }
+    return final_cust_stats
+
+
+def daily_sales_trend(conn, source=None, filters=None):
+    """
+    Returns: dictionary sorted by date.
+    """
+    where, params = _where(source, filters=filters)
+    rows = conn.execute(f"""
+        SELECT Date, SUM(Quantity * UnitPrice), COUNT(*), COUNT(DISTINCT CustomerID)
+        FROM transactions{where}
+        GROUP BY Date
+        ORDER BY Date
+    """, params).fetchall()
+
+    return {
+        date: {
+            'revenue': round(revenue, 2),
+            'transaction_count': count,
+            'unique_customers': customers
+        }
+        for date, revenue, count, customers in rows
+    }
+
+
+def run_analyses(conn, source=None, filters=None):
+    """
+    Runs the core analyses as indexed queries.
+    Returns: dictionary of analysis name -> result (same keys as pipeline.run_analyses)
+    """
+    return {
+        'total_revenue': calculate_total_revenue(conn, source, filters),
+        'region_wise_sales': region_wise_sales(conn, source, filters),
+        'top_selling_products': top_selling_products(conn, source=source, filters=filters),
+        'customer_analysis': customer_analysis(conn, source, filters),
+        'daily_sales_trend': daily_sales_trend(conn, source, filters),
+    }
+
+
+def report_data(conn, source=None, filters=None):
+    """
+    Answers every report section from indexed queries.
+    Returns: dictionary in the format of report_generator.build_report_data
+    """
+    where, params = _where(source, filters=filters)
+
+    total_records, total_revenue, min_date, max_date, enriched_count = conn.execute(f"""
+        SELECT COUNT(*), COALESCE(SUM(Quantity * UnitPrice), 0.0), MIN(Date), MAX(Date),
+               COALESCE(SUM(API_Match), 0)
+        FROM transactions{where}
+    """, params).fetchone()
+
+    regions = conn.execute(f"""
+        SELECT Region, SUM(Quantity * UnitPrice) AS sales, COUNT(*)
+        FROM transactions{where}
+        GROUP BY Region
+        ORDER BY sales DESC
+    """, params).fetchall()
+
+    product_rows = conn.execute(f"""
+        SELECT ProductName, SUM(Quantity) AS qty, SUM(Quantity * UnitPrice)
+        FROM transactions{where}
+        GROUP BY ProductName
+        ORDER BY MIN(rowid)
+    """, params).fetchall()
+    top_products = sorted(product_rows, key=lambda x: x[1], reverse=True)[:5]
+    low_performers = [name for name, qty, _ in product_rows if qty < 5]
+
+    top_customers = conn.execute(f"""
+        SELECT CustomerID, SUM(Quantity * UnitPrice) AS spent, COUNT(*)
+        FROM transactions{where}
+        GROUP BY CustomerID
+        ORDER BY spent DESC, MIN(rowid)
+        LIMIT 5
+    """, params).fetchall()
+
+    daily = conn.execute(f"""
+        SELECT Date, SUM(Quantity * UnitPrice), COUNT(*), COUNT(DISTINCT CustomerID)
+        FROM transactions{where}
+        GROUP BY Date
+        ORDER BY Date
+    """, params).fetchall()
+
+    unmatched_where, unmatched_params = _where(source, "API_Match = 0", filters)
+    failed_products = [row[0] for row in conn.execute(
+        f"SELECT DISTINCT ProductName FROM transactions{unmatched_where} ORDER BY ProductName",
+        unmatched_params
+    )]
+
+    return {
+        'total_records': total_records,
+        'total_revenue': total_revenue,
+        'date_range': (min_date, max_date) if total_records else None,
+        'regions': regions,
+        'top_products': top_products,
+        'top_customers': top_customers,
+        'daily': daily,
+        'low_performers': low_performers,
+        'enriched_count': enriched_count,
+        'enrichment_total': total_records,
+        'failed_products': failed_products,
+    }
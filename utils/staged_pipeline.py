@@ -0,0 +1,238 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.file_handler import (
+    iter_sales_batches, parse_transactions, is_valid_transaction,
+    ENRICHED_HEADER, format_enriched_row
+)
+from utils.data_processor import enrich_transaction
+from utils.dedup import TransactionDeduplicator
+from utils.partial_aggregates import empty_partial, add_to_partial
+from utils.pipeline import load_product_mapping, write_reports, _no_wrap
+
+# ==========================================
+# Staged Executor (bounded queues between stages)
+# ==========================================
+# Each stage runs in its own thread and passes batches to the next one over a
+# bounded queue. A full queue blocks the producer (backpressure), so at most
+# about queue_depth batches per stage are in flight at any time, and the I/O
+# stages (read, API, write) overlap with the CPU-bound ones.
+
+_DONE = object()
+
+
+def _source_worker(source, out_q, errors):
+    try:
+        for batch in source:
+            if errors:
+                break
+            out_q.put(batch)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        out_q.put(_DONE)
+
+
+def _stage_worker(func, in_q, out_q, errors):
+    while True:
+        batch = in_q.get()
+        if batch is _DONE:
+            break
+        # After a failure keep draining so upstream threads never block on a full queue
+        if errors:
+            continue
+        try:
+            out_q.put(func(batch))
+        except Exception as e:
+            errors.append(e)
+    out_q.put(_DONE)
+
+
+def run_stages(source, stages, sink, queue_depth=4):
+    """
+    Runs source -> stages -> sink with one thread per stage.
+    source: iterable of batches
+    stages: list of functions, each taking a batch and returning a batch
+    sink: function called with every final batch (runs in the calling thread)
+    Raises the first exception raised by any stage.
+    """
+    errors = []
+    queues = [queue.Queue(maxsize=queue_depth) for _ in range(len(stages) + 1)]
+
+    threads = [threading.Thread(target=_source_worker, args=(source, queues[0], errors), daemon=True)]
+    for i, func in enumerate(stages):
+        threads.append(threading.Thread(
+            target=_stage_worker, args=(func, queues[i], queues[i + 1], errors), daemon=True
+        ))
+    for t in threads:
+        t.start()
+
+    while True:
+        batch = queues[-1].get()
+        if batch is _DONE:
+            break
+        if errors:
+            continue
+        try:
+            sink(batch)
+        except Exception as e:
+            errors.append(e)
+
+    for t in threads:
+        t.join()
+
+    if errors:
+        raise errors[0]
+
+
+# ==========================================
+# Sales Pipeline on the Staged Executor
+# ==========================================
+def process_file_staged(input_file, catalog, enriched_file, report_file, region=None,
+                        min_amount=None, max_amount=None, formats=('text',),
+                        batch_size=1000, queue_depth=4, stage=_no_wrap, db_path=None):
+    """
+    Runs read -> parse -> validate -> enrich -> write as overlapping stages.
+    The sink writes each batch out and folds it into running aggregates, so
+    memory doesn't grow with the file.
+    catalog: Future resolving to the product mapping (enrichment waits on it).
+    Returns: summary dictionary for the file, or None if nothing could be read.
+    """
+    counts = {'read': 0, 'parsed': 0, 'invalid': 0, 'duplicates': 0, 'conflicts': 0,
+              'filtered_by_region': 0, 'filtered_by_amount': 0, 'stored': 0}
+    partial = empty_partial()
+
+    # One deduplicator spans every batch of the file
+    dedup = TransactionDeduplicator()
+    parse = stage(parse_transactions)
+
+    def parse_batch(lines):
+        counts['read'] += len(lines)
+        return parse(lines)
+
+    def validate_batch(transactions):
+        counts['parsed'] += len(transactions)
+        valid = [txn for txn in transactions if is_valid_transaction(txn)]
+        counts['invalid'] += len(transactions) - len(valid)
+        kept = []
+        for txn, kind in zip(valid, dedup.check_batch(valid)):
+            if kind != 'new':
+                counts[kind + 's'] += 1
+                continue
+            # The database needs the filtered-out rows too, so they are dropped in the sink
+            if db_path is None and not passes_filters(txn):
+                continue
+            kept.append(txn)
+        return kept
+
+    def passes_filters(txn):
+        if region and txn['Region'].lower() != region.lower():
+            counts['filtered_by_region'] += 1
+            return False
+        amount = txn['Quantity'] * txn['UnitPrice']
+        if (min_amount is not None and amount < min_amount) or \
+           (max_amount is not None and amount > max_amount):
+            counts['filtered_by_amount'] += 1
+            return False
+        return True
+
+    # Named after the stage it stands in for, so --profile-stages selects it
+    def enrich_sales_data(transactions):
+        product_mapping = catalog.result()
+        return [enrich_transaction(txn, product_mapping) for txn in transactions]
+
+    # With SQLite every validated row is stored as it arrives; the filters are
+    # applied when querying. The rows are committed only if the whole file succeeds.
+    conn = None
+    if db_path:
+        from utils import sqlite_store
+
+        source = os.path.abspath(input_file)
+        conn = sqlite_store.connect(db_path)
+        sqlite_store.clear_source(conn, source)
+
+    os.makedirs(os.path.dirname(enriched_file) or '.', exist_ok=True)
+    try:
+        with dedup, open(enriched_file, 'w', encoding='utf-8') as f:
+            f.write('|'.join(ENRICHED_HEADER) + '\n')
+
+            def write_batch(transactions):
+                if conn is not None:
+                    counts['stored'] += sqlite_store.insert_transactions(conn, transactions, source)
+                    transactions = [txn for txn in transactions if passes_filters(txn)]
+                f.write(''.join(format_enriched_row(txn) + '\n' for txn in transactions))
+                # Enriched records carry every original field, so they double as the validated set
+                add_to_partial(partial, transactions, transactions)
+
+            run_stages(
+                iter_sales_batches(input_file, batch_size),
+                [parse_batch, validate_batch, stage(enrich_sales_data)],
+                write_batch,
+                queue_depth=queue_depth
+            )
+
+        if conn is not None and counts['read']:
+            conn.commit()
+            print(f"[DB] Loaded {counts['stored']} transactions from {source}")
+    finally:
+        # Closing without a commit discards the rows of a failed or empty file
+        if conn is not None:
+            conn.close()
+
+    if counts['duplicates'] or counts['conflicts']:
+        print(f"[Validate] Removed {counts['duplicates'] + counts['conflicts']} repeated TransactionIDs "
+              f"({counts['duplicates']} exact duplicates, {counts['conflicts']} conflicting)")
+
+    if counts['read'] == 0:
+        print(f"Error: No data found in {input_file}.")
+        return None
+    print(f"[File] Successfully saved enriched data to {enriched_file}")
+
+    summary = {
+        'total_input': counts['parsed'],
+        'invalid': counts['invalid'],
+        'duplicates': counts['duplicates'],
+        'conflicts': counts['conflicts'],
+        'filtered_by_region': counts['filtered_by_region'],
+        'filtered_by_amount': counts['filtered_by_amount'],
+        'final_count': partial['records'],
+        'input_file': input_file,
+        'read': counts['read'],
+        'parsed': counts['parsed'],
+        'enriched_file': enriched_file,
+    }
+
+    return write_reports([], [], summary, report_file, formats, stage, db_path,
+                         (region, min_amount, max_amount), partial=partial)
+
+
+def run_pipeline(jobs, filters=(None, None, None), formats=('text',), fetch_catalog=True,
+                 batch_size=1000, queue_depth=4, stage=_no_wrap, db_path=None, product_mapping=None):
+    """
+    Processes jobs one after another on the staged executor.
+    The catalog fetch runs in the background and is shared by every job.
+    jobs: list of tuples (input_file, enriched_file, report_file)
+    product_mapping: an already loaded catalog (skips the fetch)
+    Returns: list of summary dictionaries (None for files that failed), in job order.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        if product_mapping is None and fetch_catalog:
+            catalog = pool.submit(load_product_mapping)
+        else:
+            catalog = pool.submit(dict, product_mapping or {})
+
+        for input_file, enriched_file, report_file in jobs:
+            try:
+                results.append(process_file_staged(
+                    input_file, catalog, enriched_file, report_file, *filters,
+                    formats=formats, batch_size=batch_size, queue_depth=queue_depth,
+                    stage=stage, db_path=db_path
+                ))
+            except Exception as e:
+                print(f"[Error] Failed to process {input_file}: {e}")
+                results.append(None)
+
+    return results